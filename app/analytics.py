@@ -11,15 +11,56 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from sklearn.feature_extraction.text import CountVectorizer
-from collections import Counter
+from collections import Counter, OrderedDict, namedtuple
 import re
 import json
+import hashlib
+import threading
+import unicodedata
+from . import shared_dataset
 
-# Variável global para armazenar os dados carregados
-_data_cache = None
+# O pyarrow é opcional: sem ele não há cópias colunares nem textos em formato Arrow
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Snapshot imutável dos dados carregados: DataFrame, versão (impressão digital), agregados e índice por período,
+# somas acumuladas por dia e segmentos dos arquivos de origem. Uma recarga monta um novo snapshot e o troca de
+# uma só vez; quem já obteve o anterior continua usando-o
+DatasetSnapshot = namedtuple('DatasetSnapshot', ['df', 'version', 'cube', 'index', 'daily', 'segments'])
+_snapshot = None
+
+# Protege a troca do snapshot e os contadores de carga
+_state_lock = threading.Lock()
+# Permite uma única carga por vez; requisições concorrentes aguardam e reaproveitam o resultado
+_load_lock = threading.Lock()
+# Quantidade de cargas iniciadas e número da última carga concluída
+_loads_started = 0
+_last_completed_load = 0
+
+# Manifesto dos arquivos de origem (data de modificação, tamanho e hash)
+_file_manifest = {}
+
+# Cache LRU das análises por período, invalidado quando a versão dos dados muda
+ANALYSIS_CACHE_SIZE = 32
+_analysis_cache = OrderedDict()
+_analysis_cache_lock = threading.Lock()
 
 # Diretório onde os arquivos CSV serão armazenados
 DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database')
+# Subdiretório (dentro de DATABASE_DIR) com as cópias colunares já processadas de cada CSV e versão do
+# formato dessas cópias (incrementada quando as colunas derivadas mudam, invalidando as antigas)
+COLUMNAR_CACHE_SUBDIR = '.cache'
+COLUMNAR_CACHE_FORMAT = 3
+# Coluna com os comentários normalizados, calculada uma única vez na leitura de cada CSV e guardada na cópia
+# colunar; na montagem do snapshot ela sai do DataFrame e passa a existir apenas no índice de comentários
+NORMALIZED_COLUMN = 'comentarios_normalizados'
+# Exibe, a cada carga, o uso de memória por linha antes e depois da compactação dos tipos
+MEMORY_REPORT = os.environ.get('MEMORY_REPORT') == '1'
 # Diretório para salvar exportações
 EXPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'exports')
 
@@ -32,79 +73,1217 @@ AREAS = [
     'beneficios', 'cultura', 'relacionamento'
 ]
 
+# Notas possíveis em cada área
+RATING_VALUES = [1, 2, 3, 4, 5]
+
+# Palavras positivas e negativas usadas na análise de sentimento dos comentários
+POSITIVE_WORDS = [
+    'bom', 'ótimo', 'excelente', 'incrível', 'maravilhoso', 'fantástico',
+    'adorei', 'gostei', 'satisfeito', 'feliz', 'contente', 'positivo',
+    'recomendo', 'aprovado', 'agradável', 'melhor', 'tranquilo'
+]
+
+NEGATIVE_WORDS = [
+    'ruim', 'péssimo', 'terrível', 'horrível', 'detestei', 'odiei',
+    'decepcionado', 'insatisfeito', 'triste', 'infeliz', 'negativo',
+    'não recomendo', 'reprovado', 'desagradável', 'pior', 'estressante',
+    'problema', 'difícil', 'complicado', 'fraco', 'errado'
+]
+
+# Sentimentos possíveis (categorias da coluna 'sentimento', calculada uma vez por linha na carga)
+SENTIMENT_LABELS = ['positive', 'negative', 'neutral']
+SENTIMENT_DTYPE = pd.CategoricalDtype(SENTIMENT_LABELS)
+
+# Arquivo JSON opcional que substitui o léxico de sentimento ({"positive": [...], "negative": [...]})
+SENTIMENT_LEXICON_FILE = os.environ.get('SENTIMENT_LEXICON_FILE')
+
+# Trechos que não são letras (pontuação, espaços, dígitos e _) viram um único espaço na normalização;
+# a versão Arrow usa as mesmas classes de caracteres
+_NON_LETTERS = re.compile(r'[\W\d_]+')
+_ARROW_NON_LETTERS = r'[^\p{L}\p{Nl}\p{No}]+'
+
+def _fold_accents(text):
+    """Decompõe os caracteres acentuados (NFD) e descarta as marcas de acentuação"""
+    return ''.join(char for char in unicodedata.normalize('NFD', text) if unicodedata.category(char) != 'Mn')
+
+def _fold_char(char):
+    """Código ASCII do caractere normalizado (32 se não for letra, 0 se a normalização o mantém fora do ASCII)"""
+    words = _NON_LETTERS.sub(' ', _fold_accents(char.lower())).split()
+    if not words:
+        return 32
+    if len(words[0]) == 1 and words[0].isascii():
+        return ord(words[0])
+    return 0
+
+# Tabela de bytes (Latin-1) da normalização: as letras viram a letra ASCII minúscula sem acento, os demais
+# caracteres viram espaço e os que continuam fora do ASCII (ex.: 'ß', 'ø') viram 0
+_LATIN1_FOLD = bytes(_fold_char(chr(code)) for code in range(256))
+_LATIN1_FOLD_ARRAY = np.frombuffer(_LATIN1_FOLD, dtype=np.uint8)
+
+# A mesma tabela sobre bytes UTF-8: continuações (0x80-0xBF) como caracteres iniciados por 0xC2 (corrigidos
+# depois para 0xC3) e 0 para os bytes iniciais de caracteres fora do Latin-1
+_UTF8_FOLD = _LATIN1_FOLD[:0xC0] + bytes(32 if code in (0xC2, 0xC3) else 0 for code in range(0xC0, 0x100))
+
+def _normalized_words(text):
+    """Retorna as palavras do texto normalizado (minúsculas, sem acentos e apenas letras)"""
+    # Textos em Latin-1 (praticamente todos os comentários) são normalizados pela tabela, em poucas chamadas em C
+    try:
+        folded = text.encode('latin-1').translate(_LATIN1_FOLD)
+    except UnicodeEncodeError:
+        folded = b'\0'
+    if b'\0' not in folded:
+        return folded.decode('ascii').split()
+    # Outros alfabetos (raros) passam pela decomposição completa
+    return _NON_LETTERS.sub(' ', _fold_accents(text.lower())).split()
+
+def normalize_text(text):
+    """Normaliza um texto: minúsculas, sem acentos e apenas letras separadas por um espaço"""
+    return ' '.join(_normalized_words(text))
+
+def _string_buffers(texts):
+    """Retorna os offsets (int64, a partir de 0) e os bytes UTF-8 de um array Arrow de textos, sem copiar os bytes"""
+    if len(texts) == 0:
+        return np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.uint8)
+    _, offsets, data = texts.buffers()
+    offset_dtype = np.int64 if pyarrow.types.is_large_string(texts.type) else np.int32
+    offsets = np.frombuffer(offsets, dtype=offset_dtype)[texts.offset:texts.offset + len(texts) + 1].astype(np.int64)
+    data = np.frombuffer(data, dtype=np.uint8)[offsets[0]:offsets[-1]] if data is not None else np.zeros(0, np.uint8)
+    return offsets - offsets[0], data
+
+def _strings_from_buffers(offsets, data):
+    """Monta um array Arrow de textos a partir dos offsets e dos bytes UTF-8 (sem copiar os bytes)"""
+    large = offsets[-1] > np.iinfo(np.int32).max
+    offsets = offsets.astype(np.int64 if large else np.int32)
+    return pyarrow.Array.from_buffers(pyarrow.large_string() if large else pyarrow.string(), len(offsets) - 1,
+                                      [None, pyarrow.py_buffer(offsets), pyarrow.py_buffer(data)])
+
+def _arrow_decompose(texts):
+    """Normaliza um array Arrow de textos pela decomposição completa dos caracteres (qualquer alfabeto)"""
+    # Separa os textos em palavras e normaliza apenas as palavras distintas, bem menos numerosas que os textos
+    tokens = pyarrow.compute.ascii_split_whitespace(pyarrow.compute.utf8_lower(texts))
+    rows = pyarrow.compute.list_parent_indices(tokens)
+    words = pyarrow.compute.list_flatten(tokens).dictionary_encode()
+    
+    folded = pyarrow.compute.utf8_normalize(words.dictionary, 'NFD')
+    folded = pyarrow.compute.replace_substring_regex(folded, r'\p{Mn}+', '')
+    folded = pyarrow.compute.replace_substring_regex(folded, _ARROW_NON_LETTERS, ' ')
+    folded = pyarrow.compute.utf8_trim(folded, ' ').take(words.indices)
+    
+    # Remonta cada texto com as palavras normalizadas, descartando as que ficaram vazias (ex.: números)
+    kept = pyarrow.compute.not_equal(folded, '')
+    folded, rows = folded.filter(kept), rows.filter(kept).to_numpy()
+    offsets = np.zeros(len(texts) + 1, dtype=np.int32)
+    np.cumsum(np.bincount(rows, minlength=len(texts)), out=offsets[1:])
+    return pyarrow.compute.binary_join(pyarrow.ListArray.from_arrays(pyarrow.array(offsets), folded), ' ')
+
+def _arrow_normalize(texts):
+    """Normaliza um array Arrow de textos sem nulos com operações vetorizadas (mesmo resultado de normalize_text)"""
+    offsets, data = _string_buffers(texts)
+    
+    # Aplica a tabela aos bytes UTF-8: os caracteres Latin-1 fora do ASCII ocupam dois bytes (0xC2/0xC3 +
+    # continuação) e o caractere fica no primeiro; os demais bytes fora do ASCII (outros alfabetos) viram 0
+    folded = np.frombuffer(bytearray(data).translate(_UTF8_FOLD), dtype=np.uint8)
+    leads = np.flatnonzero((data == 0xC2) | (data == 0xC3))
+    upper = leads[data[leads] == 0xC3] + 1
+    folded[upper] = _LATIN1_FOLD_ARRAY[data[upper] + 0x40]
+    folded[leads] = folded[leads + 1]
+    
+    # Textos com caracteres que continuam fora do ASCII usam a decomposição completa
+    fallback = np.unique(np.searchsorted(offsets, np.flatnonzero(folded == 0), side='right') - 1)
+    
+    # Mantém as letras e apenas o primeiro espaço depois de cada palavra (nunca no início de um texto)
+    letters = folded != 32
+    starts = np.zeros(len(folded) + 1, dtype=bool)
+    starts[offsets[:-1]] = True
+    kept = letters.copy()
+    kept[1:] |= letters[:-1] & ~starts[1:-1]
+    kept[leads + 1] = False
+    removed = np.flatnonzero(~kept)
+    offsets = offsets - np.searchsorted(removed, offsets)
+    
+    # O último byte mantido de um texto pode ser um espaço, que também sai: a posição original do k-ésimo
+    # byte mantido é k mais a quantidade de bytes removidos antes dele
+    ends = offsets[1:][offsets[1:] > offsets[:-1]] - 1
+    positions = ends + np.searchsorted(removed - np.arange(len(removed)), ends, side='right')
+    trailing = folded[positions] == 32
+    kept[positions[trailing]] = False
+    offsets = offsets - np.searchsorted(ends[trailing], offsets)
+    folded = folded[kept]
+    
+    normalized = _strings_from_buffers(offsets, folded)
+    if len(fallback):
+        mask = np.zeros(len(texts), dtype=bool)
+        mask[fallback] = True
+        normalized = pyarrow.compute.replace_with_mask(normalized, pyarrow.array(mask),
+                                                       _arrow_decompose(texts.take(pyarrow.array(fallback))))
+    return normalized
+
+def _arrow_words(texts):
+    """Separa um array Arrow de textos normalizados (palavras separadas por um espaço) em palavras, sem copiar os bytes
+    
+    Retorna a linha de cada palavra e as palavras; cada uma, exceto a última de cada texto, vem seguida do
+    espaço que a separa da próxima.
+    """
+    offsets, data = _string_buffers(texts)
+    
+    # Cada palavra começa no início de um texto não vazio ou logo depois de um espaço e vai até o início da seguinte
+    starts = np.zeros(len(data), dtype=bool)
+    np.equal(data[:-1], 32, out=starts[1:])
+    starts[offsets[:-1][offsets[:-1] < len(data)]] = True
+    starts = np.flatnonzero(starts)
+    rows = np.repeat(np.arange(len(texts)), np.diff(np.searchsorted(starts, offsets)))
+    return rows, _strings_from_buffers(np.append(starts, len(data)), data)
+
+def _arrow_strings(comments):
+    """Converte uma série de textos em um array Arrow (colunas já armazenadas em Arrow não são copiadas)"""
+    texts = pyarrow.array(comments, from_pandas=True)
+    if isinstance(texts, pyarrow.ChunkedArray):
+        texts = texts.combine_chunks()
+    if not pyarrow.types.is_string(texts.type) and not pyarrow.types.is_large_string(texts.type):
+        texts = pyarrow.array(comments.astype(object), type=pyarrow.string(), from_pandas=True)
+    return texts
+
+def normalize_comments(comments):
+    """Normaliza uma série de comentários de uma vez (comentários ausentes continuam ausentes)"""
+    # Cada texto distinto é normalizado uma única vez
+    if PYARROW_AVAILABLE:
+        encoded = _arrow_strings(comments).dictionary_encode()
+        normalized = _arrow_normalize(encoded.dictionary).take(encoded.indices)
+        return pd.Series(pd.arrays.ArrowStringArray(normalized), index=comments.index)
+    
+    codes, texts = pd.factorize(comments)
+    normalized = np.array([normalize_text(str(text)) for text in texts] + [None], dtype=object)
+    # O código -1 (comentário ausente) aponta para o último elemento, None
+    return pd.Series(normalized[codes], index=comments.index, dtype=object)
+
+def _compile_sentiment_matcher(positive_words, negative_words):
+    """Compila o léxico em uma única expressão regular com limites de palavra"""
+    # Os termos passam pela mesma normalização dos comentários ('não recomendo' -> 'nao recomendo')
+    polarity = {' '.join(normalize_text(word).split()): 1 for word in positive_words}
+    polarity.update({' '.join(normalize_text(word).split()): -1 for word in negative_words})
+    polarity.pop('', None)
+    
+    # Termos mais longos primeiro, para que 'não recomendo' prevaleça sobre 'recomendo'; no texto
+    # normalizado as palavras de uma expressão ficam separadas por um único espaço
+    terms = sorted(polarity, key=lambda term: (-len(term.split()), -len(term), term))
+    words = frozenset(term for term in terms if ' ' not in term)
+    phrase_starts = frozenset(term.split()[0] for term in terms if ' ' in term)
+    phrases = [re.escape(term) for term in terms if ' ' in term]
+    phrases = re.compile(r'\b(?:' + '|'.join(phrases) + r')\b') if phrases else None
+    
+    # Impressão digital do léxico: faz parte da versão dos dados e do nome das cópias colunares
+    raw = json.dumps(sorted(polarity.items()), ensure_ascii=False)
+    fingerprint = hashlib.sha1(raw.encode('utf-8')).hexdigest()[:8]
+    return {'words': words, 'phrases': phrases, 'phrase_starts': phrase_starts, 'polarity': polarity,
+            'terms': terms, 'fingerprint': fingerprint}
+
+def _load_env_lexicon():
+    """Aplica o léxico definido em SENTIMENT_LEXICON_FILE, se houver"""
+    global POSITIVE_WORDS, NEGATIVE_WORDS
+    if not SENTIMENT_LEXICON_FILE:
+        return
+    try:
+        with open(SENTIMENT_LEXICON_FILE, 'r', encoding='utf-8') as f:
+            lexicon = json.load(f)
+        POSITIVE_WORDS = list(lexicon.get('positive', POSITIVE_WORDS))
+        NEGATIVE_WORDS = list(lexicon.get('negative', NEGATIVE_WORDS))
+    except Exception as e:
+        print(f"Erro ao ler o léxico de sentimento {SENTIMENT_LEXICON_FILE}: {str(e)}")
+
+_load_env_lexicon()
+_sentiment_matcher = _compile_sentiment_matcher(POSITIVE_WORDS, NEGATIVE_WORDS)
+
+# Lista de stopwords em português usada na extração de palavras-chave
+STOPWORDS = [
+    'a', 'ao', 'aos', 'aquela', 'aquelas', 'aquele', 'aqueles', 'aquilo', 'as', 'até',
+    'com', 'como', 'da', 'das', 'de', 'dela', 'delas', 'dele', 'deles', 'depois',
+    'do', 'dos', 'e', 'ela', 'elas', 'ele', 'eles', 'em', 'entre', 'era',
+    'eram', 'éramos', 'essa', 'essas', 'esse', 'esses', 'esta', 'estas', 'este',
+    'estes', 'eu', 'foi', 'fomos', 'for', 'foram', 'fui', 'há', 'isso',
+    'isto', 'já', 'lhe', 'lhes', 'mais', 'mas', 'me', 'mesmo', 'meu',
+    'meus', 'minha', 'minhas', 'muito', 'muitos', 'na', 'não', 'nas', 'nem',
+    'no', 'nos', 'nós', 'nossa', 'nossas', 'nosso', 'nossos', 'num', 'numa',
+    'o', 'os', 'ou', 'para', 'pela', 'pelas', 'pelo', 'pelos', 'por',
+    'qual', 'quando', 'que', 'quem', 'são', 'se', 'seja', 'sem', 'seu',
+    'seus', 'só', 'somos', 'sou', 'sua', 'suas', 'também', 'te', 'tem',
+    'tém', 'temos', 'tenho', 'teu', 'teus', 'tu', 'tua', 'tuas', 'um',
+    'uma', 'você', 'vocês', 'vos'
+]
+
+# Stopwords na forma normalizada dos comentários (sem acentos)
+_NORMALIZED_STOPWORDS = sorted({normalize_text(word).strip() for word in STOPWORDS})
+
+# Índice invertido dos comentários normalizados de um arquivo, com as linhas locais ao arquivo.
+# texts: comentários normalizados; terms: vocabulário; indptr/rows/counts: para cada termo, as linhas em
+# que aparece e quantas vezes; lengths: número de palavras de cada linha
+CommentIndex = namedtuple('CommentIndex', ['texts', 'terms', 'indptr', 'rows', 'counts', 'lengths'])
+
+# Segmento de um arquivo CSV no snapshot: caminho, hash do conteúdo, linhas do snapshot vindas do arquivo
+# (em ordem) e índice dos seus comentários. A busca consulta cada segmento e junta os resultados nas linhas
+# do snapshot, de modo que o índice de um arquivo só é montado quando ele é lido
+FileSegment = namedtuple('FileSegment', ['path', 'hash', 'rows', 'comments'])
+
+# Tamanho padrão e máximo das páginas de resultados da busca e parâmetros da pontuação BM25
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+SEARCH_BM25_K1 = 1.2
+SEARCH_BM25_B = 0.75
+
+# Paginação dos comentários: tamanho padrão e máximo das páginas, lote do streaming e quantos comentários
+# cada análise guarda como prévia (o painel e o relatório exibem apenas os primeiros)
+COMMENTS_PAGE_SIZE = 50
+COMMENTS_MAX_PAGE_SIZE = 500
+COMMENTS_STREAM_BATCH = 1000
+COMMENTS_PREVIEW_SIZE = 10
+
+# Modelo de palavras-chave de cada arquivo, ajustado uma única vez por conteúdo do arquivo e reaproveitado
+# nas recargas: termos normalizados, matriz esparsa com a contagem de termos de cada linha do arquivo e
+# contagem de cada grafia (em minúsculas) das palavras dos comentários originais
+KeywordModel = namedtuple('KeywordModel', ['terms', 'matrix', 'spellings'])
+_keyword_models = {}
+_keyword_model_lock = threading.Lock()
+# Grafia exibida de cada palavra normalizada, reunida das grafias de todos os arquivos: (versão, {palavra: grafia})
+_keyword_spellings = (None, {})
+
+# Janela padrão (em dias) da média móvel de tendência e limite de dias para a tendência automática ser semanal
+TREND_ROLLING_WINDOW = 30
+TREND_WEEKLY_MAX_DAYS = 92
+
+# Chaves de período qualificadas pelo ano (ex.: 2024-03, 2024-Q1, 2024-S1) e quantos meses cada uma abrange
+PERIOD_KEY_PATTERNS = {
+    'month': re.compile(r'^(\d{4})-(0[1-9]|1[0-2])$'),
+    'quarter': re.compile(r'^(\d{4})-Q([1-4])$'),
+    'semester': re.compile(r'^(\d{4})-S([12])$')
+}
+PERIOD_MONTHS = {'month': 1, 'quarter': 3, 'semester': 6}
+
+# Tipos de período aceitos nos filtros
+PERIOD_TYPES = ('month', 'quarter', 'semester', 'year', 'all', 'range')
+
 def load_data(force_reload=False):
     """Carrega os dados de todos os arquivos CSV na pasta database"""
-    global _data_cache
+    snapshot = get_snapshot(force_reload)
+    return None if snapshot is None else snapshot.df
+
+def get_snapshot(force_reload=False):
+    """Retorna o snapshot atual dos dados, carregando-o se necessário (uma única carga por vez)"""
+    global _snapshot, _loads_started, _last_completed_load
     
-    # Se já temos dados carregados e não é forçada a recarga, retorna os dados em cache
-    if _data_cache is not None and not force_reload:
-        return _data_cache
+    # Se já temos dados carregados e não é forçada a recarga, retorna o snapshot atual
+    # (no modo compartilhado, recarrega quando outro worker publicou uma nova geração)
+    snapshot = _snapshot
+    if snapshot is not None and not force_reload and not shared_dataset.is_stale():
+        return snapshot
     
-    # Lista todos os arquivos CSV na pasta database
-    csv_files = glob.glob(os.path.join(DATABASE_DIR, '*.csv'))
+    with _state_lock:
+        ticket = _loads_started
     
-    if not csv_files:
+    with _load_lock:
+        # Uma carga iniciada depois deste pedido já foi concluída enquanto aguardávamos
+        if _last_completed_load > ticket:
+            return _snapshot
+        if _snapshot is not None and not force_reload and not shared_dataset.is_stale():
+            return _snapshot
+        
+        with _state_lock:
+            _loads_started += 1
+            load_number = _loads_started
+        
+        snapshot = _load_snapshot(_snapshot)
+        
+        # Troca o snapshot de uma só vez
+        with _state_lock:
+            _snapshot = snapshot
+            _last_completed_load = load_number
+        return snapshot
+
+def _load_snapshot(current):
+    """Monta um novo snapshot quando os arquivos CSV mudaram, lendo apenas os arquivos novos ou alterados"""
+    manifest = _scan_files()
+    if not manifest:
         print("Nenhum arquivo CSV encontrado na pasta 'database'")
         return None
     
-    # Lista para armazenar os DataFrames de cada arquivo
-    dfs = []
+    # Calcula a versão do conjunto de dados a partir do conteúdo dos arquivos de origem
+    version = _compute_data_version(manifest)
+    
+    # Nada mudou (e nenhum outro worker publicou uma nova geração): mantém o snapshot atual
+    if current is not None and version == current.version and not shared_dataset.is_stale():
+        return current
+    
+    if current is None or version != current.version:
+        with _analysis_cache_lock:
+            _analysis_cache.clear()
+    
+    # No modo compartilhado, apenas o processo que publica a geração lê os arquivos; os demais
+    # (e ele próprio, depois de publicar) usam as tabelas mapeadas dos arquivos compartilhados
+    tables = shared_dataset.load_shared(version, lambda: _snapshot_tables(*_build_frame(manifest, current)))
+    if tables is not None:
+        return _snapshot_from_tables(tables, version)
+    
+    df, segments = _build_frame(manifest, current)
+    if df is None:
+        return None
+    return _make_snapshot(df, version, segments, _update_daily_prefix(current, df, segments))
+
+def _make_snapshot(df, version, segments, daily=None):
+    """Monta o snapshot com os agregados e o índice de linhas por período pré-calculados"""
+    if daily is None:
+        daily = _build_daily_prefix(df)
+    return DatasetSnapshot(df=df, version=version, cube=_build_period_cube(daily), index=_build_period_index(df),
+                           daily=daily, segments=segments)
+
+def _snapshot_tables(df, segments):
+    """Separa o DataFrame e os segmentos dos arquivos em tabelas para o compartilhamento entre workers"""
+    if df is None:
+        return None
+    
+    # Os arrays dos segmentos são concatenados; cada tabela reúne os de mesmo comprimento e a tabela
+    # 'segments' guarda o tamanho de cada um
+    indexes = [segment.comments for segment in segments]
+    return {
+        'data': df,
+        'segments': pd.DataFrame({
+            'path': [segment.path for segment in segments],
+            'hash': [segment.hash for segment in segments],
+            'rows': [len(segment.rows) for segment in segments],
+            'terms': [len(index.terms) for index in indexes],
+            'postings': [len(index.rows) for index in indexes]
+        }),
+        'segment_rows': pd.DataFrame({
+            'rows': np.concatenate([segment.rows for segment in segments]),
+            'texts': pd.concat([index.texts for index in indexes], ignore_index=True),
+            'lengths': np.concatenate([index.lengths for index in indexes])
+        }),
+        'comment_terms': pd.DataFrame({'terms': np.concatenate([index.terms for index in indexes])}),
+        'comment_indptr': pd.DataFrame({'indptr': np.concatenate([index.indptr for index in indexes])}),
+        'comment_postings': pd.DataFrame({'rows': np.concatenate([index.rows for index in indexes]),
+                                          'counts': np.concatenate([index.counts for index in indexes])})
+    }
+
+def _snapshot_from_tables(tables, version):
+    """Monta o snapshot a partir das tabelas compartilhadas (None se não houver dados)"""
+    if not tables:
+        return None
+    
+    # Cada segmento é um recorte (sem cópia) dos arrays mapeados
+    layout = tables['segments']
+    segment_rows = tables['segment_rows']
+    rows = segment_rows['rows'].to_numpy()
+    lengths = segment_rows['lengths'].to_numpy()
+    terms = tables['comment_terms']['terms'].to_numpy(dtype=object).astype(str)
+    indptr = tables['comment_indptr']['indptr'].to_numpy()
+    postings = tables['comment_postings']['rows'].to_numpy()
+    counts = tables['comment_postings']['counts'].to_numpy()
+    
+    segments = []
+    row_start = term_start = posting_start = 0
+    for path, file_hash, n_rows, n_terms, n_postings in zip(layout['path'], layout['hash'], layout['rows'],
+                                                            layout['terms'], layout['postings']):
+        row_stop, term_stop, posting_stop = row_start + n_rows, term_start + n_terms, posting_start + n_postings
+        # Cada segmento tem n_terms + 1 posições em indptr
+        index = CommentIndex(
+            texts=segment_rows['texts'].iloc[row_start:row_stop].reset_index(drop=True),
+            terms=terms[term_start:term_stop],
+            indptr=indptr[term_start + len(segments):term_stop + len(segments) + 1],
+            rows=postings[posting_start:posting_stop],
+            counts=counts[posting_start:posting_stop],
+            lengths=lengths[row_start:row_stop]
+        )
+        segments.append(FileSegment(path=path, hash=file_hash, rows=rows[row_start:row_stop], comments=index))
+        row_start, term_start, posting_start = row_stop, term_stop, posting_stop
+    return _make_snapshot(tables['data'], version, segments)
+
+def _scan_files():
+    """Atualiza o manifesto dos arquivos CSV (data de modificação, tamanho e hash), calculando o hash só dos alterados"""
+    global _file_manifest
     
-    # Processa cada arquivo CSV
-    for file_path in csv_files:
+    manifest = {}
+    for file_path in sorted(glob.glob(os.path.join(DATABASE_DIR, '*.csv'))):
         try:
-            # Lê o arquivo CSV assumindo que a primeira linha é o cabeçalho
-            df = pd.read_csv(file_path, encoding='utf-8')
-            
-            # Verifica se temos uma coluna de data no DataFrame
-            if 'data_desligamento' in df.columns:
-                # Converte para formato de data
-                df['data_desligamento'] = pd.to_datetime(df['data_desligamento'])
-                
-                # Adiciona colunas para facilitar filtragem por período
-                df['ano'] = df['data_desligamento'].dt.year
-                df['mes'] = df['data_desligamento'].dt.month
-                df['trimestre'] = df['data_desligamento'].dt.quarter
-                df['semestre'] = (df['data_desligamento'].dt.month > 6).astype(int) + 1
-                
-                # Adiciona o DataFrame à lista
-                dfs.append(df)
-            else:
-                print(f"Arquivo {file_path} não contém a coluna 'data_desligamento'")
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        
+        entry = _file_manifest.get(file_path)
+        if entry is None or entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+            entry = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'hash': _file_hash(file_path)}
+        manifest[file_path] = entry
+    
+    # Descarta as cópias colunares de arquivos removidos
+    for file_path in _file_manifest:
+        if file_path not in manifest:
+            _remove_sidecars(file_path)
+    _file_manifest = manifest
+    return manifest
+
+def _build_frame(manifest, current=None):
+    """Monta o DataFrame consolidado, ordenado por data, e os segmentos dos arquivos, lendo apenas os arquivos novos ou alterados
+    
+    As linhas e os segmentos dos arquivos inalterados vêm do snapshot atual; as linhas dos arquivos lidos
+    são intercaladas a elas por busca binária, com o mesmo resultado de ler todos os arquivos e ordená-los.
+    """
+    ranks = {file_path: rank for rank, file_path in enumerate(manifest)}
+    kept = []
+    if current is not None:
+        kept = [segment for segment in current.segments
+                if segment.path in manifest and manifest[segment.path]['hash'] == segment.hash]
+    kept_paths = {segment.path for segment in kept}
+    
+    # Arquivos já processados vêm das cópias colunares (sem reler o CSV nem recalcular o sentimento);
+    # os DataFrames por arquivo existem apenas durante a junção
+    sources, frames = [], []
+    for file_path, entry in manifest.items():
+        if file_path in kept_paths:
+            continue
+        frame = _load_file_frame(file_path, entry['hash'])
+        if frame is not None:
+            sources.append((file_path, entry['hash']))
+            frames.append(frame)
+    if not kept and not frames:
+        return None, []
+    
+    # Linhas atuais dos arquivos inalterados (sem cópia quando nenhum arquivo saiu)
+    base = None
+    if kept and len(kept) < len(current.segments):
+        keep = np.sort(np.concatenate([segment.rows for segment in kept]))
+        base = current.df.take(keep).reset_index(drop=True)
+        kept = [segment._replace(rows=np.searchsorted(keep, segment.rows).astype(segment.rows.dtype))
+                for segment in kept]
+    elif kept:
+        base = current.df
+    n_base = 0 if base is None else len(base)
+    
+    # O índice de comentários de cada arquivo lido é montado antes da junção (e leva os comentários normalizados)
+    indexes = [_build_comment_index(frame) for frame in frames]
+    sizes = [len(frame) for frame in frames]
+    added = pd.concat(frames, ignore_index=True) if frames else None
+    del frames
+    
+    # Concatena os arquivos lidos sempre na mesma ordem (caminho do arquivo), de modo que o resultado seja
+    # idêntico em todos os processos, e ordena por data (a ordenação estável aproveita os trechos já ordenados)
+    n_added = 0 if added is None else len(added)
+    order = np.zeros(0, dtype=np.int64)
+    if added is not None:
+        order = np.argsort(added['data_desligamento'].to_numpy(), kind='stable')
+    
+    # Posição de cada linha lida entre as linhas atuais: depois das de data anterior e, na mesma data, depois
+    # das de arquivos anteriores na ordem dos caminhos
+    insert = np.zeros(n_added, dtype=np.int64)
+    if base is not None and n_added:
+        base_ranks = np.empty(n_base, dtype=np.int32)
+        for segment in kept:
+            base_ranks[segment.rows] = ranks[segment.path]
+        added_ranks = np.repeat([ranks[file_path] for file_path, _ in sources], sizes)[order]
+        insert = _merge_positions(base['data_desligamento'].to_numpy(), base_ranks,
+                                  added['data_desligamento'].to_numpy()[order], added_ranks)
+    
+    # Linha do snapshot de cada linha: as lidas avançam uma posição para cada linha lida antes delas, e as
+    # atuais, uma para cada linha lida intercalada antes delas. As linhas de cada arquivo continuam em ordem
+    n_rows = n_base + n_added
+    position_dtype = np.int32 if n_rows < np.iinfo(np.int32).max else np.int64
+    added_positions = np.empty(n_added, dtype=position_dtype)
+    added_positions[order] = insert + np.arange(n_added)
+    base_positions = np.arange(n_base) + np.searchsorted(insert, np.arange(n_base), side='right')
+    
+    starts = np.cumsum([0] + sizes)
+    segments = [segment._replace(rows=base_positions[segment.rows].astype(position_dtype)) for segment in kept]
+    segments += [
+        FileSegment(path=file_path, hash=file_hash, rows=added_positions[start:stop], comments=index)
+        for (file_path, file_hash), index, start, stop in zip(sources, indexes, starts[:-1], starts[1:])
+    ]
+    segments.sort(key=lambda segment: ranks[segment.path])
+    
+    # Monta o DataFrame já na ordem final, com uma única cópia das linhas
+    if added is None:
+        merged = base
+    else:
+        source = np.empty(n_rows, dtype=np.int64)
+        source[base_positions] = np.arange(n_base)
+        source[added_positions] = n_base + np.arange(n_added)
+        merged = pd.concat([frame for frame in (base, added) if frame is not None], ignore_index=True)
+        merged = merged.take(source).reset_index(drop=True)
+    
+    # Categorias de arquivos diferentes viram objetos na junção; compacta novamente
+    df = _compact_frame(merged)
+    if MEMORY_REPORT:
+        report = get_memory_report(df)
+        print(f"Memória dos dados: {report['bytes_per_row_before']:.1f} -> "
+              f"{report['bytes_per_row_after']:.1f} bytes por linha ({report['rows']} linhas)")
+    return df, segments
+
+def _merge_positions(base_dates, base_ranks, dates, ranks):
+    """Posição de inserção, entre linhas ordenadas por (data, arquivo), de cada linha nova (também ordenada)"""
+    insert = np.searchsorted(base_dates, dates, side='left')
+    stop = np.searchsorted(base_dates, dates, side='right')
+    
+    # Nas datas já presentes, as linhas atuais estão ordenadas pelo arquivo: a nova vai depois das de
+    # arquivos anteriores ao seu (contadas por somas acumuladas, uma por arquivo lido)
+    ties = np.flatnonzero(stop > insert)
+    for rank in np.unique(ranks[ties]):
+        before = np.zeros(len(base_ranks) + 1, dtype=np.int64)
+        np.cumsum(base_ranks < rank, out=before[1:])
+        tied = ties[ranks[ties] == rank]
+        insert[tied] += before[stop[tied]] - before[insert[tied]]
+    return insert
+
+def _load_file_frame(file_path, file_hash):
+    """Obtém o DataFrame processado de um CSV, usando a cópia colunar quando ela existir"""
+    if not PYARROW_AVAILABLE:
+        return _parse_csv(file_path)
+    
+    cache_dir = os.path.join(DATABASE_DIR, COLUMNAR_CACHE_SUBDIR)
+    basename = os.path.basename(file_path)
+    lexicon = _sentiment_matcher['fingerprint']
+    sidecar_path = os.path.join(cache_dir, f"{basename}.{file_hash[:16]}.{lexicon}.v{COLUMNAR_CACHE_FORMAT}.feather")
+    
+    if os.path.exists(sidecar_path):
+        try:
+            # Lê os textos diretamente como strings Arrow, sem criar objetos Python
+            table = pyarrow.feather.read_table(sidecar_path)
+            return _compact_frame(table.to_pandas(types_mapper=_arrow_types_mapper))
         except Exception as e:
-            print(f"Erro ao processar arquivo {file_path}: {str(e)}")
+            print(f"Erro ao ler cópia colunar de {file_path}: {str(e)}")
+    
+    df = _parse_csv(file_path)
+    if df is None:
+        return None
+    
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Remove as cópias de versões anteriores do mesmo arquivo
+        _remove_sidecars(file_path)
+        temp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+        df.to_feather(temp_path)
+        os.replace(temp_path, sidecar_path)
+    except Exception as e:
+        print(f"Erro ao gravar cópia colunar de {file_path}: {str(e)}")
+    
+    return df
+
+def _arrow_types_mapper(arrow_type):
+    """Mapeia as colunas de texto Arrow para o tipo string do pandas baseado em Arrow"""
+    if arrow_type in (pyarrow.string(), pyarrow.large_string()):
+        return pd.StringDtype('pyarrow')
+    return None
+
+def _remove_sidecars(file_path):
+    """Remove as cópias colunares de um arquivo CSV"""
+    cache_dir = os.path.join(DATABASE_DIR, COLUMNAR_CACHE_SUBDIR)
+    pattern = os.path.join(cache_dir, f"{glob.escape(os.path.basename(file_path))}.*.feather")
+    for sidecar_path in glob.glob(pattern):
+        try:
+            os.remove(sidecar_path)
+        except OSError:
+            pass
+
+def _parse_csv(file_path):
+    """Lê um arquivo CSV e adiciona as colunas de período (retorna None se for inválido)"""
+    try:
+        # Lê o arquivo CSV assumindo que a primeira linha é o cabeçalho
+        df = pd.read_csv(file_path, encoding='utf-8')
+        
+        # Verifica se temos uma coluna de data no DataFrame
+        if 'data_desligamento' not in df.columns:
+            print(f"Arquivo {file_path} não contém a coluna 'data_desligamento'")
+            return None
+        
+        # Converte para formato de data
+        df['data_desligamento'] = pd.to_datetime(df['data_desligamento'])
+        
+        # Adiciona colunas para facilitar filtragem por período
+        df['ano'] = df['data_desligamento'].dt.year
+        df['mes'] = df['data_desligamento'].dt.month
+        df['trimestre'] = df['data_desligamento'].dt.quarter
+        df['semestre'] = (df['data_desligamento'].dt.month > 6).astype(int) + 1
+        
+        # Normaliza e classifica o sentimento de cada comentário uma única vez, na carga do arquivo
+        if 'comentarios' in df.columns:
+            df[NORMALIZED_COLUMN] = normalize_comments(df['comentarios'])
+            df['sentimento'] = score_sentiments(df['comentarios'], df[NORMALIZED_COLUMN])
+        
+        # Mantém cada arquivo ordenado para que a junção seja barata
+        df = df.sort_values('data_desligamento', kind='stable').reset_index(drop=True)
+        return _compact_frame(df)
+    except Exception as e:
+        print(f"Erro ao processar arquivo {file_path}: {str(e)}")
+        return None
+
+def _compact_frame(df):
+    """Converte as colunas para tipos compactos (int8/int16, categorias e strings Arrow)"""
+    # Notas e partes do período cabem em int8 (o ano precisa de int16)
+    compact_ints = {area: np.int8 for area in AREAS}
+    compact_ints.update({'mes': np.int8, 'trimestre': np.int8, 'semestre': np.int8, 'ano': np.int16})
+    for column, dtype in compact_ints.items():
+        if column not in df.columns:
+            continue
+        # Colunas que viraram float por valores ausentes de um arquivo já retirado voltam a ser inteiras
+        if df[column].dtype.kind == 'f' and df[column].notna().all() and (df[column] % 1 == 0).all():
+            df[column] = df[column].astype(np.int64)
+        if df[column].dtype.kind in 'iu':
+            info = np.iinfo(dtype)
+            if df[column].between(info.min, info.max).all():
+                df[column] = df[column].astype(dtype)
+    
+    # Poucos motivos distintos: categoria em vez de uma string por linha
+    if 'Motivo_Desligamento' in df.columns and df['Motivo_Desligamento'].dtype != 'category':
+        df['Motivo_Desligamento'] = df['Motivo_Desligamento'].astype('category')
+    elif 'Motivo_Desligamento' in df.columns:
+        # Motivos que existiam apenas em arquivos já retirados saem das categorias
+        df['Motivo_Desligamento'] = df['Motivo_Desligamento'].cat.remove_unused_categories()
+    
+    # Sentimentos como categoria de 1 byte (a junção de arquivos pode convertê-los em objetos)
+    if 'sentimento' in df.columns and df['sentimento'].dtype != SENTIMENT_DTYPE:
+        df['sentimento'] = df['sentimento'].astype(SENTIMENT_DTYPE)
+    
+    # Comentários (originais e normalizados) em um único buffer Arrow em vez de objetos Python
+    for column in ('comentarios', NORMALIZED_COLUMN):
+        if PYARROW_AVAILABLE and column in df.columns and df[column].dtype == object:
+            df[column] = df[column].astype(pd.StringDtype('pyarrow'))
+    
+    return df
+
+def get_memory_report(df=None):
+    """Retorna os bytes por linha do DataFrame atual e dos mesmos dados com os tipos padrão do pandas"""
+    df = load_data() if df is None else df
+    if df is None or df.empty:
+        return None
+    
+    after = df.memory_usage(deep=True, index=False)
+    before = {}
+    for column in df.columns:
+        if df[column].dtype.kind in 'iub':
+            before[column] = len(df) * 8
+        elif df[column].dtype.kind in 'fmM':
+            before[column] = int(after[column])
+        else:
+            # Texto e categorias ocupariam objetos Python por linha
+            before[column] = int(df[column].astype(object).memory_usage(deep=True, index=False))
+    
+    return {
+        'rows': len(df),
+        'bytes_per_row_before': sum(before.values()) / len(df),
+        'bytes_per_row_after': int(after.sum()) / len(df)
+    }
+
+def _file_hash(file_path):
+    """Calcula o hash do conteúdo de um arquivo, lendo-o em blocos"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _compute_data_version(manifest):
+    """Calcula uma impressão digital do conjunto de dados a partir dos hashes dos arquivos"""
+    digest = hashlib.sha1()
+    # O sentimento de cada linha depende do léxico em uso
+    digest.update(f"lexicon:{_sentiment_matcher['fingerprint']};".encode('utf-8'))
+    for file_path in sorted(manifest):
+        digest.update(f"{os.path.basename(file_path)}:{manifest[file_path]['hash']};".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def _build_period_cube(daily):
+    """Monta o cubo de agregados por período e área a partir das somas acumuladas por dia"""
+    if daily is None:
+        return None
+    areas = daily['areas']
+    
+    # Histogramas de notas por ano e mês: os dias de cada mês são consecutivos, e o histograma do mês é a
+    # diferença entre as somas acumuladas no seu primeiro dia e no primeiro dia do mês seguinte
+    months = daily['days'].astype('datetime64[M]').astype(np.int64)
+    groups, starts = np.unique(months, return_index=True)
+    histograms = np.diff(daily['prefix'][np.append(starts, len(months))], axis=0)
+    groups = groups + 1970 * 12
+    
+    # Os demais períodos são derivados somando os histogramas de ano/mês
+    years = groups // 12
+    months = groups % 12 + 1
+    period_labels = {
+        'month': months,
+        'quarter': (months - 1) // 3 + 1,
+        'semester': (months > 6).astype(int) + 1,
+        'year': years,
+        'all': np.zeros(len(groups), dtype=int)
+    }
+    
+    cube = {}
+    for period_type, labels in period_labels.items():
+        for label in np.unique(labels):
+            value = 'all' if period_type == 'all' else int(label)
+            cube[(period_type, value)] = _aggregate_histogram(areas, histograms[labels == label].sum(axis=0))
+    
+    # Períodos qualificados pelo ano (ex.: 2024-03, 2024-Q1): os meses de cada um são consecutivos nos grupos
+    for period_type, span in PERIOD_MONTHS.items():
+        buckets = groups // span
+        for bucket in np.unique(buckets):
+            key = format_period_key(period_type, bucket * span)
+            cube[(period_type, key)] = _aggregate_histogram(areas, histograms[buckets == bucket].sum(axis=0))
+    
+    return cube
+
+def _positions_or_slice(positions):
+    """Troca posições ordenadas e consecutivas pelo recorte equivalente (iloc com recorte não copia os dados)"""
+    if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+        return slice(int(positions[0]), int(positions[-1]) + 1)
+    return positions
+
+def _build_period_index(df):
+    """Monta o índice de linhas por período: intervalos contíguos por ano e por mês do calendário e posições por mês, trimestre e semestre (recortes quando contíguas)"""
+    columns = {'year': 'ano', 'month': 'mes', 'quarter': 'trimestre', 'semester': 'semestre'}
+    if df.empty or any(df[column].dtype.kind not in 'iu' for column in columns.values()):
+        return None
+    
+    index = {}
+    
+    # Os dados estão ordenados por data, então cada ano e cada mês do calendário ocupam um intervalo
+    # contíguo de linhas; guarda os meses (ano * 12 + mês - 1) em ordem e a linha em que cada um começa
+    years = df['ano'].to_numpy()
+    if np.all(years[:-1] <= years[1:]):
+        values = np.unique(years)
+        starts = np.searchsorted(years, values, side='left')
+        stops = np.searchsorted(years, values, side='right')
+        index['year'] = {int(value): slice(int(start), int(stop)) for value, start, stop in zip(values, starts, stops)}
+        
+        month_keys = years.astype(np.int32) * 12 + df['mes'].to_numpy().astype(np.int32) - 1
+        if np.all(month_keys[:-1] <= month_keys[1:]):
+            months = np.unique(month_keys)
+            index['calendar'] = (months, np.searchsorted(month_keys, months, side='left'), len(df))
+    
+    # Mês, trimestre e semestre se repetem a cada ano: guarda as posições (em ordem) de cada valor.
+    # Quando elas são contíguas (ex.: dados de um único ano) guarda o recorte, e o filtro é uma visão;
+    # com vários anos o filtro copia apenas as linhas do valor, em vez de varrer o DataFrame inteiro
+    position_dtype = np.int32 if len(df) < np.iinfo(np.int32).max else np.int64
+    for period_type, column in columns.items():
+        if period_type in index:
+            continue
+        codes = df[column].to_numpy()
+        order = np.argsort(codes, kind='stable').astype(position_dtype)
+        sorted_codes = codes[order]
+        values = np.unique(sorted_codes)
+        starts = np.searchsorted(sorted_codes, values, side='left')
+        stops = np.searchsorted(sorted_codes, values, side='right')
+        index[period_type] = {
+            int(value): _positions_or_slice(order[start:stop]) for value, start, stop in zip(values, starts, stops)
+        }
+    
+    return index
+
+def _build_daily_prefix(df):
+    """Monta as somas acumuladas, dia a dia, dos histogramas de notas (consultas por intervalo de datas)"""
+    areas = [area for area in AREAS if area in df.columns]
+    if df.empty or not areas:
+        return None
+    
+    daily = _daily_histograms(df, areas)
+    return None if daily is None else _daily_prefix(areas, *daily)
+
+def _daily_histograms(df, areas):
+    """Histogramas de notas de cada dia presente nas linhas (dias em ordem); None se houver notas fora de 1 a 5 ou datas ausentes"""
+    if not df[areas].isin(RATING_VALUES).all().all():
+        return None
+    dates = df['data_desligamento'].to_numpy()
+    if np.isnat(dates).any():
+        return None
+    
+    days, codes = np.unique(dates.astype('datetime64[D]'), return_inverse=True)
+    return days, _rating_histograms(df[areas].to_numpy(), codes, len(days))
+
+def _daily_prefix(areas, days, histograms):
+    """Acumula os histogramas diários: prefix[i] guarda o histograma de todas as linhas anteriores ao i-ésimo dia presente nos dados"""
+    prefix = np.zeros((len(days) + 1,) + histograms.shape[1:], dtype=np.int64)
+    np.cumsum(histograms, axis=0, out=prefix[1:])
+    
+    # Somas e contagens acumuladas por área (usadas pela tendência)
+    return {
+        'areas': areas,
+        'days': days,
+        'prefix': prefix,
+        'sum': prefix @ np.array(RATING_VALUES),
+        'count': prefix.sum(axis=2)
+    }
+
+def _update_daily_prefix(current, df, segments):
+    """Atualiza as somas acumuladas por dia do snapshot atual apenas com as linhas dos arquivos incluídos e retirados"""
+    # Sem somas válidas no snapshot atual (ou com outras áreas), monta tudo a partir do DataFrame
+    areas = [area for area in AREAS if area in df.columns]
+    if current is None or current.daily is None or current.daily['areas'] != areas or df.empty:
+        return _build_daily_prefix(df)
+    
+    # Os histogramas diários atuais são as diferenças das somas; somam-se os dias dos arquivos incluídos
+    # e subtraem-se os dos retirados
+    previous = {(segment.path, segment.hash) for segment in current.segments}
+    following = {(segment.path, segment.hash) for segment in segments}
+    added = [segment.rows for segment in segments if (segment.path, segment.hash) not in previous]
+    removed = [segment.rows for segment in current.segments if (segment.path, segment.hash) not in following]
+    days = [current.daily['days']]
+    histograms = [np.diff(current.daily['prefix'], axis=0)]
+    for frame, rows, sign in ((df, added, 1), (current.df, removed, -1)):
+        if not rows:
+            continue
+        daily = _daily_histograms(frame[['data_desligamento'] + areas].take(np.concatenate(rows)), areas)
+        if daily is None:
+            return None
+        days.append(daily[0])
+        histograms.append(sign * daily[1])
     
-    # Se não há DataFrames válidos, retorna None
-    if not dfs:
+    # Junta os dias e descarta os que ficaram sem linhas
+    days, codes = np.unique(np.concatenate(days), return_inverse=True)
+    combined = np.zeros((len(days),) + histograms[0].shape[1:], dtype=np.int64)
+    np.add.at(combined, codes, np.concatenate(histograms))
+    present = combined[:, 0].sum(axis=1) > 0
+    return _daily_prefix(areas, days[present], combined[present])
+
+def format_date_range(start=None, end=None):
+    """Monta o valor de um período 'range' (AAAA-MM-DD_AAAA-MM-DD, datas inclusivas; qualquer uma pode faltar)"""
+    start = str(np.datetime64(start, 'D')) if start else ''
+    end = str(np.datetime64(end, 'D')) if end else ''
+    if start and end and start > end:
+        raise ValueError("a data inicial é posterior à data final")
+    return f"{start}_{end}"
+
+def parse_date_range(period_value):
+    """Converte o valor de um período 'range' em (início, fim exclusivo) como datetime64[D]; None se for inválido"""
+    try:
+        start, end = str(period_value).split('_')
+        start = np.datetime64(start, 'D') if start else None
+        end = np.datetime64(end, 'D') + np.timedelta64(1, 'D') if end else None
+    except ValueError:
         return None
+    return start, end
+
+def _filter_dates(df, dates, index=None):
+    """Filtra as linhas de um intervalo de datas [início, fim) usando busca binária na coluna de datas ordenada"""
+    start, stop = dates
+    values = df['data_desligamento'].to_numpy()
     
-    # Concatena todos os DataFrames em um único
-    _data_cache = pd.concat(dfs, ignore_index=True)
+    # Com índice o DataFrame é o do snapshot, ordenado por data: o intervalo é um recorte contíguo
+    if index is not None:
+        row_start = int(np.searchsorted(values, np.datetime64(start, 'ns'), side='left')) if start is not None else 0
+        row_stop = int(np.searchsorted(values, np.datetime64(stop, 'ns'), side='left')) if stop is not None else len(df)
+        return df.iloc[row_start:max(row_start, row_stop)]
     
-    # Ordena por data de desligamento
-    _data_cache = _data_cache.sort_values('data_desligamento')
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= values >= np.datetime64(start, 'ns')
+    if stop is not None:
+        mask &= values < np.datetime64(stop, 'ns')
+    return df[mask]
+
+def _range_aggregate(daily, period_value):
+    """Obtém os agregados de um intervalo de datas pela diferença de duas somas acumuladas"""
+    dates = parse_date_range(period_value)
+    if daily is None or dates is None:
+        return None
+    
+    start, stop = dates
+    days = daily['days']
+    first = int(np.searchsorted(days, start, side='left')) if start is not None else 0
+    last = int(np.searchsorted(days, stop, side='left')) if stop is not None else len(days)
+    if last <= first:
+        return None
+    return _aggregate_histogram(daily['areas'], daily['prefix'][last] - daily['prefix'][first])
+
+def _period_bounds(period_type, period_value):
+    """Retorna o intervalo de datas [início, fim) de um período contíguo (None nos extremos abertos)"""
+    if period_type == 'range':
+        return parse_date_range(period_value) or (None, None)
+    
+    months = parse_period_key(period_type, period_value)
+    if months is None and period_type == 'year' and period_value != 'all':
+        try:
+            months = (int(period_value) * 12, int(period_value) * 12 + 12)
+        except (TypeError, ValueError):
+            months = None
+    if months is None:
+        # Todos os dados, ou períodos que se repetem a cada ano (ex.: mês 3)
+        return None, None
     
-    return _data_cache
+    # Meses absolutos (ano * 12 + mês - 1) contados a partir de 1970, como no datetime64[M]
+    start, stop = (np.datetime64(month - 1970 * 12, 'M').astype('datetime64[D]') for month in months)
+    return start, stop
+
+def get_trend(granularity='auto', period_type='all', period_value='all', window=TREND_ROLLING_WINDOW):
+    """Calcula a média de cada área ao longo do período, por mês, por semana ou em janela móvel de dias"""
+    snapshot = get_snapshot()
+    daily = None if snapshot is None else snapshot.daily
+    if daily is None or len(daily['days']) == 0:
+        return None
+    
+    # Limites do período, restritos aos dias presentes nos dados
+    days = daily['days']
+    start, stop = _period_bounds(period_type, period_value)
+    start = days[0] if start is None else max(start, days[0])
+    stop = days[-1] + np.timedelta64(1, 'D') if stop is None else min(stop, days[-1] + np.timedelta64(1, 'D'))
+    if stop <= start:
+        return None
+    
+    if granularity == 'auto':
+        granularity = 'week' if (stop - start).astype(int) <= TREND_WEEKLY_MAX_DAYS else 'month'
+    
+    # Limites de cada balde: início (inclusivo) e fim (exclusivo) em dias
+    if granularity == 'month':
+        months = np.arange(start.astype('datetime64[M]'), (stop - 1).astype('datetime64[M]') + 1)
+        bucket_starts = np.maximum(months.astype('datetime64[D]'), start)
+        bucket_stops = np.minimum((months + 1).astype('datetime64[D]'), stop)
+        labels = [str(month) for month in months]
+    elif granularity == 'week':
+        # Semanas de segunda a domingo (1970-01-01 foi uma quinta-feira)
+        first_monday = start - (start.astype(int) + 3) % 7
+        weeks = np.arange(first_monday, stop, np.timedelta64(7, 'D'))
+        bucket_starts = np.maximum(weeks, start)
+        bucket_stops = np.minimum(weeks + np.timedelta64(7, 'D'), stop)
+        labels = [str(week) for week in weeks]
+    elif granularity == 'rolling':
+        # Uma janela de `window` dias terminando em cada dia do período
+        bucket_stops = np.arange(start, stop) + np.timedelta64(1, 'D')
+        bucket_starts = bucket_stops - np.timedelta64(int(window), 'D')
+        labels = [str(day) for day in bucket_stops - np.timedelta64(1, 'D')]
+    else:
+        raise ValueError(f"Granularidade de tendência desconhecida: {granularity}")
+    
+    # Cada balde é a diferença de duas posições das somas acumuladas (busca binária nos dias)
+    lower = np.searchsorted(days, bucket_starts, side='left')
+    upper = np.searchsorted(days, bucket_stops, side='left')
+    sums = daily['sum'][upper] - daily['sum'][lower]
+    counts = daily['count'][upper] - daily['count'][lower]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    
+    # Média geral do balde: média das médias das áreas, como em analyze_period
+    present = counts > 0
+    overall = np.where(present.any(axis=1), np.nansum(means, axis=1) / np.maximum(present.sum(axis=1), 1), np.nan)
+    
+    def as_list(values):
+        return [None if np.isnan(value) else float(value) for value in values]
+    
+    return {
+        'granularity': granularity,
+        'window': int(window) if granularity == 'rolling' else None,
+        'labels': labels,
+        'counts': counts[:, 0].tolist(),
+        'areas': {area: as_list(means[:, index]) for index, area in enumerate(daily['areas'])},
+        'overall': as_list(overall)
+    }
+
+def parse_period_key(period_type, period_value):
+    """Converte uma chave qualificada pelo ano (2024-03, 2024-Q1, 2024-S1) no intervalo de meses [início, fim)"""
+    pattern = PERIOD_KEY_PATTERNS.get(period_type)
+    match = pattern.match(str(period_value)) if pattern is not None else None
+    if match is None:
+        return None
+    
+    # Meses contados de forma absoluta (ano * 12 + mês - 1)
+    span = PERIOD_MONTHS[period_type]
+    start = int(match.group(1)) * 12 + (int(match.group(2)) - 1) * span
+    return start, start + span
+
+def validate_period(period_type, period_value):
+    """Confere o tipo e o valor de um período pedido pelo usuário; lança ValueError se forem inválidos"""
+    if period_type not in PERIOD_TYPES:
+        raise ValueError(f"tipo de período desconhecido: {period_type}")
+    if period_type == 'all' or period_value == 'all':
+        return period_type, period_value
+    if period_type == 'range':
+        if parse_date_range(period_value) is None:
+            raise ValueError(f"intervalo de datas inválido: {period_value}")
+        return period_type, period_value
+    if parse_period_key(period_type, period_value) is not None:
+        return period_type, period_value
+    
+    # Valores simples: ano, ou mês/trimestre/semestre que se repete a cada ano (ex.: mês 3)
+    try:
+        value = int(period_value)
+    except (TypeError, ValueError):
+        raise ValueError(f"valor de período inválido: {period_value}")
+    if period_type != 'year' and not 1 <= value <= 12 // PERIOD_MONTHS[period_type]:
+        raise ValueError(f"valor de período fora do intervalo: {period_value}")
+    return period_type, period_value
+
+def format_period_key(period_type, month_key):
+    """Monta a chave qualificada pelo ano do período que contém o mês absoluto informado"""
+    year, month = divmod(int(month_key), 12)
+    if period_type == 'month':
+        return f"{year}-{month + 1:02d}"
+    if period_type == 'quarter':
+        return f"{year}-Q{month // 3 + 1}"
+    if period_type == 'semester':
+        return f"{year}-S{month // 6 + 1}"
+    return year
+
+def _calendar_months(snapshot):
+    """Retorna, em ordem, os meses absolutos (ano * 12 + mês - 1) presentes nos dados"""
+    if snapshot.index is not None and 'calendar' in snapshot.index:
+        return snapshot.index['calendar'][0]
+    periods = snapshot.df[['ano', 'mes']].dropna()
+    return np.unique(periods['ano'].to_numpy(dtype=np.int64) * 12 + periods['mes'].to_numpy(dtype=np.int64) - 1)
+
+def _filter_months(df, months, index=None):
+    """Filtra as linhas de um intervalo de meses absolutos [início, fim) usando busca binária no índice"""
+    start, stop = months
+    if index is not None and 'calendar' in index:
+        keys, row_starts, n_rows = index['calendar']
+        first, last = np.searchsorted(keys, [start, stop], side='left')
+        row_start = int(row_starts[first]) if first < len(keys) else n_rows
+        row_stop = int(row_starts[last]) if last < len(keys) else n_rows
+        return df.iloc[row_start:row_stop]
+    
+    month_keys = df['ano'] * 12 + df['mes'] - 1
+    return df[(month_keys >= start) & (month_keys < stop)]
+
+def _rating_histograms(values, groups=None, n_groups=1):
+    """Conta as notas (1 a 5) de cada coluna da matriz de avaliações, opcionalmente por grupo"""
+    n_ratings = len(RATING_VALUES)
+    histograms = np.empty((n_groups, values.shape[1], n_ratings), dtype=np.int64)
+    offsets = None if groups is None else np.asarray(groups, dtype=np.intp) * n_ratings
+    
+    # Um único bincount por coluna produz o histograma de todos os grupos de uma vez
+    for index in range(values.shape[1]):
+        codes = values[:, index].astype(np.intp) - RATING_VALUES[0]
+        if offsets is not None:
+            codes += offsets
+        counts = np.bincount(codes, minlength=n_groups * n_ratings)
+        histograms[:, index, :] = counts.reshape(n_groups, n_ratings)
+    
+    return histograms if groups is not None else histograms[0]
+
+def compute_area_statistics(df):
+    """Calcula as estatísticas de todas as áreas de uma vez a partir da matriz de notas"""
+    areas = [area for area in AREAS if area in df.columns]
+    if df.empty or not areas:
+        return {}
+    
+    values = df[areas].to_numpy()
+    
+    # O histograma exige notas inteiras de 1 a 5; caso contrário usa as reduções do pandas
+    if values.dtype.kind not in 'iu' or values.min() < RATING_VALUES[0] or values.max() > RATING_VALUES[-1]:
+        result = {}
+        for area in areas:
+            result[area] = {
+                'name': area.capitalize(),
+                'mean': df[area].mean(),
+                'median': df[area].median(),
+                'mode': df[area].mode()[0],
+                'std': df[area].std(),
+                'min': df[area].min(),
+                'max': df[area].max(),
+                'distribution': df[area].value_counts().to_dict()
+            }
+        return result
+    
+    histogram = _rating_histograms(values)
+    return _areas_from_aggregate(_aggregate_histogram(areas, histogram))
+
+def _aggregate_histogram(areas, histogram):
+    """Calcula contagem, soma, soma dos quadrados, mínimo e máximo a partir dos histogramas de notas"""
+    ratings = np.array(RATING_VALUES)
+    present = histogram > 0
+    return {
+        'areas': areas,
+        'rows': int(histogram[0].sum()),
+        'count': histogram.sum(axis=1),
+        'sum': histogram @ ratings,
+        'sumsq': histogram @ (ratings * ratings),
+        'min': np.where(present.any(axis=1), ratings[present.argmax(axis=1)], 0),
+        'max': np.where(present.any(axis=1), ratings[::-1][present[:, ::-1].argmax(axis=1)], 0),
+        'hist': histogram
+    }
+
+def _statistics_from_aggregate(aggregate, index):
+    """Obtém as estatísticas de uma área (média, mediana, moda etc.) a partir do cubo"""
+    histogram = aggregate['hist'][index]
+    count = int(aggregate['count'][index])
+    total = int(aggregate['sum'][index])
+    total_sq = int(aggregate['sumsq'][index])
+    
+    # Mediana: valor central (ou média dos dois centrais) da distribuição acumulada
+    cumulative = np.cumsum(histogram)
+    lower = RATING_VALUES[int(np.searchsorted(cumulative, (count - 1) // 2, side='right'))]
+    upper = RATING_VALUES[int(np.searchsorted(cumulative, count // 2, side='right'))]
+    
+    # Distribuição ordenada pela frequência, como em value_counts()
+    distribution = {
+        rating: int(freq)
+        for freq, rating in sorted(zip(histogram, RATING_VALUES), key=lambda item: (-item[0], item[1]))
+        if freq > 0
+    }
+    
+    return {
+        'mean': total / count,
+        'median': (lower + upper) / 2,
+        'mode': RATING_VALUES[int(np.argmax(histogram))],
+        'std': ((count * total_sq - total * total) / (count * (count - 1))) ** 0.5 if count > 1 else float('nan'),
+        'min': int(aggregate['min'][index]),
+        'max': int(aggregate['max'][index]),
+        'distribution': distribution
+    }
+
+def _period_aggregate(snapshot, period_type, period_value):
+    """Retorna os agregados pré-calculados do período, ou None se não estiverem disponíveis"""
+    if period_type == 'range':
+        return _range_aggregate(snapshot.daily, period_value)
+    
+    cube = snapshot.cube
+    if cube is None:
+        return None
+    if period_type == 'all' or period_value == 'all':
+        return cube.get(('all', 'all'))
+    if parse_period_key(period_type, period_value) is not None:
+        return cube.get((period_type, str(period_value)))
+    try:
+        return cube.get((period_type, int(period_value)))
+    except (TypeError, ValueError):
+        return None
+
+def get_period_statistics(period_type, period_value):
+    """Retorna a contagem e as estatísticas por área do período (sem palavras-chave e comentários)"""
+    snapshot = get_snapshot()
+    aggregate = None if snapshot is None else _period_aggregate(snapshot, period_type, period_value)
+    if aggregate is not None:
+        return {
+            'count': aggregate['rows'],
+            'areas': _areas_from_aggregate(aggregate)
+        }
+    
+    # Sem cubo (ex.: notas fora do padrão), recorre à análise completa
+    analysis = analyze_period(period_type, period_value)
+    if analysis is None:
+        return None
+    return {'count': analysis['count'], 'areas': analysis['areas']}
+
+def _areas_from_aggregate(aggregate):
+    """Monta o dicionário de estatísticas por área a partir do cubo"""
+    areas = {}
+    for index, area in enumerate(aggregate['areas']):
+        area_data = {'name': area.capitalize()}
+        area_data.update(_statistics_from_aggregate(aggregate, index))
+        areas[area] = area_data
+    return areas
+
+def get_data_version():
+    """Retorna a versão do conjunto de dados carregado (None se não houver dados)"""
+    snapshot = get_snapshot()
+    return None if snapshot is None else snapshot.version
 
 def get_available_periods():
     """Retorna os períodos disponíveis nos dados"""
-    df = load_data()
-    if df is None:
+    snapshot = get_snapshot()
+    if snapshot is None:
         return {}
     
-    # Obtém períodos disponíveis
+    # Obtém os períodos disponíveis a partir dos meses do calendário presentes nos dados (em ordem),
+    # com mês, trimestre e semestre qualificados pelo ano (ex.: 2024-03, 2024-Q1, 2024-S1)
+    months = _calendar_months(snapshot)
     result = {
-        'month': sorted(df['mes'].unique().tolist()),
-        'quarter': sorted(df['trimestre'].unique().tolist()),
-        'semester': sorted(df['semestre'].unique().tolist()),
-        'year': sorted(df['ano'].unique().tolist()),
-        'all': ['Todos']
+        period_type: list(dict.fromkeys(format_period_key(period_type, month) for month in months))
+        for period_type in ['month', 'quarter', 'semester', 'year']
     }
+    result['all'] = ['Todos']
     
     return result
 
-def filter_by_period(df, period_type, period_value):
-    """Filtra os dados de acordo com o período selecionado"""
+def filter_by_period(df, period_type, period_value, index=None):
+    """Filtra os dados de acordo com o período selecionado (index: índice de períodos do mesmo snapshot)"""
     if df is None:
         return None
     
@@ -112,9 +1291,33 @@ def filter_by_period(df, period_type, period_value):
     if period_type == 'all' or period_value == 'all':
         return df
     
-    # Converte period_value para inteiro se não for 'all'
+    # Sem índice informado, usa o do snapshot atual quando o DataFrame é o dele
+    if index is None:
+        snapshot = _snapshot
+        if snapshot is not None and df is snapshot.df:
+            index = snapshot.index
+    
+    # Intervalos de datas (ex.: 2024-01-15_2024-03-31) são resolvidos por busca binária nas datas
+    if period_type == 'range':
+        dates = parse_date_range(period_value)
+        return None if dates is None else _filter_dates(df, dates, index)
+    
+    # Períodos qualificados pelo ano (ex.: 2024-03, 2024-Q1, 2024-S1) são intervalos contíguos de linhas
+    months = parse_period_key(period_type, period_value)
+    if months is not None:
+        return _filter_months(df, months, index)
+    
+    # Valores simples (ex.: mês 3) reúnem o mesmo mês, trimestre ou semestre de todos os anos
     period_value = int(period_value)
     
+    # Com o índice, o ano é um recorte contíguo (visão sem cópia); mês, trimestre e semestre também,
+    # se ocorrem em um único ano, e do contrário uma seleção por posições (cópia só das linhas do valor)
+    if index is not None and period_type in index:
+        rows = index[period_type].get(period_value)
+        if rows is None:
+            return df.iloc[0:0]
+        return df.iloc[rows]
+    
     # Filtra de acordo com o tipo de período
     if period_type == 'month':
         return df[df['mes'] == period_value]
@@ -129,11 +1332,31 @@ def filter_by_period(df, period_type, period_value):
     return None
 
 def analyze_period(period_type, period_value):
-    """Analisa os dados para o período especificado"""
-    df = load_data()
+    """Analisa os dados para o período especificado (resultado compartilhado, não deve ser alterado)"""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return None
+    
+    # Reaproveita a análise se o mesmo período já foi calculado para esta versão dos dados
+    key = (snapshot.version, period_type, str(period_value))
+    with _analysis_cache_lock:
+        if key in _analysis_cache:
+            _analysis_cache.move_to_end(key)
+            return _analysis_cache[key]
     
+    analysis = _analyze_period(snapshot, period_type, period_value)
+    
+    with _analysis_cache_lock:
+        _analysis_cache[key] = analysis
+        if len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+    
+    return analysis
+
+def _analyze_period(snapshot, period_type, period_value):
+    """Calcula a análise do período sobre os dados do snapshot informado"""
     # Filtra os dados para o período específico
-    filtered_df = filter_by_period(df, period_type, period_value)
+    filtered_df = filter_by_period(snapshot.df, period_type, period_value, snapshot.index)
     
     if filtered_df is None or filtered_df.empty:
         return None
@@ -146,25 +1369,25 @@ def analyze_period(period_type, period_value):
             'value': period_value
         },
         'areas': {},
-        'keywords': extract_keywords(filtered_df),
-        'comments': process_comments(filtered_df),
+        'keywords': _snapshot_keywords(snapshot, filtered_df),
+        'comments': [],
+        'comment_count': 0,
+        'sentiment_counts': count_sentiments(filtered_df),
         'overall_mean': 0.0  # Inicializa a média geral
     }
     
-    # Analisa cada área
-    for area in AREAS:
-        if area in filtered_df.columns:
-            area_data = {
-                'name': area.capitalize(),
-                'mean': filtered_df[area].mean(),
-                'median': filtered_df[area].median(),
-                'mode': filtered_df[area].mode()[0],
-                'std': filtered_df[area].std(),
-                'min': filtered_df[area].min(),
-                'max': filtered_df[area].max(),
-                'distribution': filtered_df[area].value_counts().to_dict()
-            }
-            analysis['areas'][area] = area_data
+    # Guarda apenas a contagem e uma prévia dos comentários; a lista completa é paginada (get_comments_page)
+    if 'comentarios' in filtered_df.columns:
+        rows = filtered_df.index[filtered_df['comentarios'].notna().to_numpy()]
+        analysis['comment_count'] = len(rows)
+        analysis['comments'] = _comment_records(snapshot.df, rows[:COMMENTS_PREVIEW_SIZE].to_numpy())
+    
+    # Analisa cada área, preferindo os agregados pré-calculados do período
+    aggregate = _period_aggregate(snapshot, period_type, period_value)
+    if aggregate is not None:
+        analysis['areas'] = _areas_from_aggregate(aggregate)
+    else:
+        analysis['areas'] = compute_area_statistics(filtered_df)
     
     # Calcula a média geral se houver áreas analisadas
     if analysis['areas']:
@@ -180,66 +1403,392 @@ def analyze_period(period_type, period_value):
     
     return analysis
 
-def extract_keywords(df, comment_column='comentarios', min_freq=2):
-    """Extrai palavras-chave dos comentários dos desligados"""
-    if df is None or df.empty or comment_column not in df.columns:
+def _word_spellings(comments):
+    """Conta as palavras (em minúsculas, com acentos) dos comentários originais"""
+    if PYARROW_AVAILABLE:
+        lowered = pyarrow.compute.utf8_lower(_arrow_strings(comments))
+        spaced = pyarrow.compute.replace_substring_regex(lowered, r'[^\p{L}\p{M}\p{Nl}\p{No}]+', ' ')
+        counts = pyarrow.compute.value_counts(pyarrow.compute.list_flatten(pyarrow.compute.ascii_split_whitespace(spaced)))
+        return Counter(dict(zip(counts.field('values').to_pylist(), counts.field('counts').to_pylist())))
+    
+    counter = Counter()
+    for text, count in comments.dropna().astype(str).value_counts().items():
+        for word in re.findall(r'[^\W\d_]+', text.lower()):
+            counter[word] += count
+    return counter
+
+def _keyword_display_names(snapshot, terms, comment_column='comentarios'):
+    """Recupera a grafia mais frequente (com acentos), em todos os arquivos, de cada termo normalizado das palavras-chave"""
+    global _keyword_spellings
+    
+    version, spellings = _keyword_spellings
+    if version != snapshot.version:
+        # Soma as grafias contadas em cada arquivo; cada palavra normalizada é exibida na mais usada
+        word_counts = Counter()
+        for segment in snapshot.segments:
+            word_counts.update(_get_keyword_model(snapshot, segment, comment_column).spellings)
+        spellings = {}
+        for word, count in word_counts.items():
+            key = normalize_text(word).strip()
+            if (count, word) > spellings.get(key, (0, '')):
+                spellings[key] = (count, word)
+        _keyword_spellings = (snapshot.version, spellings)
+    
+    return np.array([' '.join(spellings.get(word, (0, word))[1] for word in term.split()) for term in terms],
+                    dtype=object)
+
+def _get_keyword_model(snapshot, segment, comment_column='comentarios'):
+    """Retorna o modelo de palavras-chave de um arquivo do snapshot (ajustado uma única vez por conteúdo do arquivo)"""
+    key = (segment.path, segment.hash)
+    model = _keyword_models.get(key)
+    if model is not None:
+        return model
+    
+    with _keyword_model_lock:
+        model = _keyword_models.get(key)
+        if model is not None:
+            return model
+        
+        # Uma linha por registro do arquivo (comentário ausente vira texto vazio) para que a linha i da matriz
+        # corresponda à linha local i do segmento
+        processed_comments = segment.comments.texts.fillna('').tolist()
+        
+        # Unigramas e bigramas sem frequência mínima: ela é aplicada por período
+        vectorizer = CountVectorizer(stop_words=_NORMALIZED_STOPWORDS, lowercase=False, ngram_range=(1, 2),
+                                     dtype=np.int32)
+        try:
+            matrix = vectorizer.fit_transform(processed_comments).tocsr()
+            terms = vectorizer.get_feature_names_out()
+        except ValueError:
+            # Nenhum termo além das stopwords
+            matrix, terms = None, None
+        spellings = _word_spellings(snapshot.df[comment_column].take(segment.rows))
+        
+        # Descarta os modelos de arquivos que já não fazem parte dos dados
+        current = {(other.path, other.hash) for other in snapshot.segments}
+        for stale in [stale for stale in _keyword_models if stale not in current]:
+            del _keyword_models[stale]
+        
+        _keyword_models[key] = model = KeywordModel(terms=terms, matrix=matrix, spellings=spellings)
+        return model
+
+def _segment_rows(segment, rows):
+    """Leva linhas do snapshot (recorte ou posições em ordem) às linhas locais de um arquivo (recorte ou posições)"""
+    if isinstance(rows, slice):
+        start, stop = np.searchsorted(segment.rows, [rows.start, rows.stop])
+        return slice(int(start), int(stop))
+    local = np.searchsorted(segment.rows, rows)
+    found = local < len(segment.rows)
+    found[found] = segment.rows[local[found]] == rows[found]
+    return local[found]
+
+def _snapshot_keywords(snapshot, filtered_df, comment_column='comentarios', min_freq=2):
+    """Extrai as palavras-chave de um recorte do snapshot somando as linhas das matrizes de termos dos arquivos"""
+    if filtered_df is None or filtered_df.empty or comment_column not in snapshot.df.columns:
         return {}
     
-    # Filtra apenas comentários não vazios
-    comments = df[comment_column].dropna().astype(str).tolist()
+    # O índice do recorte é a posição das linhas no snapshot
+    rows = filtered_df.index
+    if isinstance(rows, pd.RangeIndex) and rows.step == 1:
+        rows = slice(rows.start, rows.stop)
+    else:
+        rows = rows.to_numpy()
     
-    if not comments:
+    # Em cada arquivo, intervalos contíguos usam os vetores da matriz CSR diretamente, sem cópia. Cada termo
+    # aparece no máximo uma vez por linha: a contagem dos índices é o número de comentários com o termo
+    # (frequência mínima, como o min_df do CountVectorizer)
+    terms, document_freq, term_counts = [], [], []
+    for segment in snapshot.segments:
+        local_rows = _segment_rows(segment, rows)
+        if not (local_rows.stop > local_rows.start if isinstance(local_rows, slice) else len(local_rows)):
+            continue
+        model = _get_keyword_model(snapshot, segment, comment_column)
+        if model.matrix is None:
+            continue
+        
+        matrix = model.matrix
+        if isinstance(local_rows, slice):
+            start, stop = matrix.indptr[local_rows.start], matrix.indptr[local_rows.stop]
+            indices, counts = matrix.indices[start:stop], matrix.data[start:stop]
+        else:
+            selected_rows = matrix[local_rows]
+            indices, counts = selected_rows.indices, selected_rows.data
+        frequency = np.bincount(indices, minlength=len(model.terms))
+        present = np.flatnonzero(frequency)
+        terms.append(model.terms[present])
+        document_freq.append(frequency[present])
+        term_counts.append(np.bincount(indices, weights=counts, minlength=len(model.terms))[present])
+    if not terms:
         return {}
     
-    # Pré-processamento de texto
-    processed_comments = []
-    for comment in comments:
-        # Converte para minúsculas
-        comment = comment.lower()
-        # Remove pontuação
-        comment = re.sub(r'[^\w\s]', '', comment)
-        # Remove números
-        comment = re.sub(r'\d+', '', comment)
-        processed_comments.append(comment)
-    
-    # Lista de stopwords em português
-    stopwords = [
-        'a', 'ao', 'aos', 'aquela', 'aquelas', 'aquele', 'aqueles', 'aquilo', 'as', 'até',
-        'com', 'como', 'da', 'das', 'de', 'dela', 'delas', 'dele', 'deles', 'depois',
-        'do', 'dos', 'e', 'ela', 'elas', 'ele', 'eles', 'em', 'entre', 'era',
-        'eram', 'éramos', 'essa', 'essas', 'esse', 'esses', 'esta', 'estas', 'este',
-        'estes', 'eu', 'foi', 'fomos', 'for', 'foram', 'fui', 'há', 'isso',
-        'isto', 'já', 'lhe', 'lhes', 'mais', 'mas', 'me', 'mesmo', 'meu',
-        'meus', 'minha', 'minhas', 'muito', 'muitos', 'na', 'não', 'nas', 'nem',
-        'no', 'nos', 'nós', 'nossa', 'nossas', 'nosso', 'nossos', 'num', 'numa',
-        'o', 'os', 'ou', 'para', 'pela', 'pelas', 'pelo', 'pelos', 'por',
-        'qual', 'quando', 'que', 'quem', 'são', 'se', 'seja', 'sem', 'seu',
-        'seus', 'só', 'somos', 'sou', 'sua', 'suas', 'também', 'te', 'tem',
-        'tém', 'temos', 'tenho', 'teu', 'teus', 'tu', 'tua', 'tuas', 'um',
-        'uma', 'você', 'vocês', 'vos'
-    ]
+    # Junta as contagens dos arquivos pelo termo (em ordem alfabética)
+    terms, term_ids = np.unique(np.concatenate(terms), return_inverse=True)
+    document_freq = np.bincount(term_ids, weights=np.concatenate(document_freq), minlength=len(terms))
+    term_counts = np.bincount(term_ids, weights=np.concatenate(term_counts), minlength=len(terms)).astype(np.int64)
+    
+    # Ordena por contagem (mais frequentes primeiro), mantendo a ordem alfabética nos empates
+    selected = np.flatnonzero(document_freq >= min_freq)
+    selected = selected[np.argsort(-term_counts[selected], kind='stable')]
+    
+    return dict(zip(_keyword_display_names(snapshot, terms[selected], comment_column), term_counts[selected]))
+
+def _build_comment_index(df):
+    """Monta o índice invertido com os comentários normalizados do DataFrame de um arquivo, retirando-os dele (termos em ordem alfabética, linhas em ordem)"""
+    # Os comentários já foram normalizados na leitura de cada arquivo; sem a coluna de comentários, ficam ausentes
+    if NORMALIZED_COLUMN in df.columns:
+        texts = df.pop(NORMALIZED_COLUMN)
+    else:
+        texts = pd.Series([None] * len(df), dtype=object)
+    n_rows = len(texts)
+    
+    # Separa os comentários normalizados em palavras: linha de cada ocorrência e identificador da palavra
+    if PYARROW_AVAILABLE:
+        tokens = pyarrow.compute.ascii_split_whitespace(_arrow_strings(texts))
+        rows = pyarrow.compute.list_parent_indices(tokens).to_numpy()
+        words = pyarrow.compute.list_flatten(tokens).dictionary_encode()
+        word_ids = words.indices.to_numpy()
+        terms = words.dictionary.to_numpy(zero_copy_only=False)
+    else:
+        split = [text.split() if isinstance(text, str) else [] for text in texts]
+        rows = np.repeat(np.arange(n_rows), [len(words) for words in split])
+        word_ids, terms = pd.factorize(np.array([word for words in split for word in words], dtype=object))
+        terms = np.asarray(terms, dtype=object)
+    
+    # Vocabulário em ordem alfabética (a busca localiza os termos por busca binária)
+    terms, term_ranks = np.unique(terms.astype(str), return_inverse=True)
+    word_ids = term_ranks[word_ids]
+    
+    # Agrupa as ocorrências por (termo, linha): cada par vira uma entrada da lista do termo, com a contagem
+    stride = max(n_rows, 1)
+    pairs, counts = np.unique(word_ids.astype(np.int64) * stride + rows, return_counts=True)
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pairs // stride, minlength=len(terms)), out=indptr[1:])
+    
+    position_dtype = np.int32 if n_rows < np.iinfo(np.int32).max else np.int64
+    return CommentIndex(texts=texts, terms=terms, indptr=indptr, rows=(pairs % stride).astype(position_dtype),
+                        counts=counts.astype(np.int32), lengths=np.bincount(rows, minlength=n_rows).astype(np.int32))
+
+def _parse_search_query(query):
+    """Separa a consulta em termos e expressões entre aspas, já normalizados como os comentários"""
+    terms, phrases = [], []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query or ''):
+        words = normalize_text(phrase or word).split()
+        if len(words) == 1:
+            terms.append(words[0])
+        elif words:
+            # Palavras que a normalização separa (ex.: 'bem-vindo') são tratadas como expressão
+            phrases.append(' '.join(words))
+    return terms, phrases
+
+def _contains_phrase(texts, rows, phrase):
+    """Indica, para cada linha informada, se o comentário normalizado contém a expressão"""
+    if PYARROW_AVAILABLE:
+        # Busca simples do trecho e, só nos textos que o contêm, a confirmação dos limites de palavra
+        selected = _arrow_strings(texts).take(pyarrow.array(rows))
+        found = np.flatnonzero(pyarrow.compute.match_substring(selected, phrase).to_numpy(zero_copy_only=False))
+        bounded = pyarrow.compute.match_substring_regex(selected.take(pyarrow.array(found)), f'(?:^| ){phrase}(?: |$)')
+        contains = np.zeros(len(rows), dtype=bool)
+        contains[found[bounded.to_numpy(zero_copy_only=False)]] = True
+        return contains
+    return np.array([f' {phrase} ' in f' {texts.iat[row]} ' for row in rows], dtype=bool)
+
+def _period_positions(snapshot, period_type, period_value):
+    """Linhas do snapshot em um período (recorte ou posições em ordem), sem montar o DataFrame; None se inválido"""
+    if period_type == 'all' or period_value == 'all':
+        return slice(0, len(snapshot.df))
+    
+    # Valores simples (ex.: mês 3) vêm direto do índice de períodos
+    index = snapshot.index
+    if index is not None and period_type in index and parse_period_key(period_type, period_value) is None:
+        try:
+            rows = index[period_type].get(int(period_value))
+        except (TypeError, ValueError):
+            return None
+        return slice(0, 0) if rows is None else rows
+    
+    filtered_df = filter_by_period(snapshot.df, period_type, period_value, index)
+    if filtered_df is None:
+        return None
+    rows = filtered_df.index
+    if isinstance(rows, pd.RangeIndex) and rows.step == 1:
+        return slice(rows.start, rows.stop)
+    return rows.to_numpy()
+
+def search_comments(query, period_type='all', period_value='all', page=1, per_page=SEARCH_PAGE_SIZE):
+    """Busca comentários por termos e expressões entre aspas (todos obrigatórios), ordenados por relevância"""
+    page = max(int(page), 1)
+    per_page = min(max(int(per_page), 1), SEARCH_MAX_PAGE_SIZE)
+    result = {'query': query, 'total': 0, 'page': page, 'per_page': per_page, 'pages': 0, 'results': []}
+    
+    snapshot = get_snapshot()
+    terms, phrases = _parse_search_query(query)
+    if snapshot is None or not snapshot.segments or not (terms or phrases):
+        return result
+    period_rows = _period_positions(snapshot, period_type, period_value)
+    if period_rows is None:
+        return result
+    
+    # Cada arquivo tem o seu segmento do índice: as linhas encontradas em cada um são levadas às linhas do
+    # snapshot, com a frequência de cada palavra e o tamanho do comentário, e a pontuação usa as estatísticas
+    # de todos os segmentos
+    words = list(dict.fromkeys(terms + [word for phrase in phrases for word in phrase.split()]))
+    document_freq = np.zeros(len(words))
+    total_length = 0
+    matches, frequencies, lengths = [], [], []
+    for segment in snapshot.segments:
+        index = segment.comments
+        total_length += int(index.lengths.sum())
+        positions = np.searchsorted(index.terms, words)
+        found = [position < len(index.terms) and index.terms[position] == word
+                 for position, word in zip(positions, words)]
+        postings = [slice(index.indptr[position], index.indptr[position + 1]) if present else slice(0, 0)
+                    for position, present in zip(positions, found)]
+        document_freq += [posting.stop - posting.start for posting in postings]
+        if not all(found):
+            continue
+        
+        # Linhas que contêm todas as palavras da consulta: interseção das listas, da menor para a maior
+        rows = None
+        for posting in sorted(postings, key=lambda posting: posting.stop - posting.start):
+            posting_rows = index.rows[posting]
+            rows = posting_rows if rows is None else np.intersect1d(rows, posting_rows, assume_unique=True)
+        
+        # Restringe ao período: intervalos contíguos por busca binária, os demais por interseção
+        snapshot_rows = segment.rows[rows]
+        if isinstance(period_rows, slice):
+            selected = slice(np.searchsorted(snapshot_rows, period_rows.start),
+                             np.searchsorted(snapshot_rows, period_rows.stop))
+        else:
+            selected = np.intersect1d(snapshot_rows, period_rows, assume_unique=True, return_indices=True)[1]
+        rows = rows[selected]
+        
+        # As expressões são conferidas no texto normalizado apenas das linhas candidatas
+        for phrase in phrases:
+            if len(rows):
+                rows = rows[_contains_phrase(index.texts, rows, phrase)]
+        if not len(rows):
+            continue
+        
+        matches.append(segment.rows[rows])
+        frequencies.append(np.column_stack([
+            index.counts[posting][np.searchsorted(index.rows[posting], rows)] for posting in postings
+        ]))
+        lengths.append(index.lengths[rows])
+    if not matches:
+        return result
+    rows = np.concatenate(matches)
+    frequencies = np.concatenate(frequencies)
+    lengths = np.concatenate(lengths)
+    
+    # Pontuação BM25 de cada linha; empates ficam com os desligamentos mais recentes
+    n_rows = len(snapshot.df)
+    norm = SEARCH_BM25_K1 * (1 - SEARCH_BM25_B + SEARCH_BM25_B * lengths / max(total_length / max(n_rows, 1), 1))
+    idf = np.log(1 + (n_rows - document_freq + 0.5) / (document_freq + 0.5))
+    scores = (idf * frequencies * (SEARCH_BM25_K1 + 1) / (frequencies + norm[:, None])).sum(axis=1)
+    
+    # Ordena apenas o necessário para a página pedida: as linhas com pontuação até a da última posição da página
+    start = (page - 1) * per_page
+    stop = min(start + per_page, len(rows))
+    result['total'] = int(len(rows))
+    result['pages'] = int(-(-len(rows) // per_page))
+    if start >= len(rows):
+        return result
+    top = np.arange(len(rows))
+    if stop < len(rows):
+        top = np.flatnonzero(scores >= np.partition(scores, len(rows) - stop)[len(rows) - stop])
+    top = top[np.lexsort((-rows[top], -scores[top]))][start:stop]
     
-    # Usando CountVectorizer para extrair as palavras-chave
-    vectorizer = CountVectorizer(
-        stop_words=stopwords,
-        min_df=min_freq,  # Frequência mínima
-        ngram_range=(1, 2)  # Unigrams e bigrams
-    )
+    # Monta apenas as linhas da página
+    result['results'] = _comment_records(snapshot.df, rows[top])
+    for record, score in zip(result['results'], scores[top]):
+        record['score'] = round(float(score), 4)
+    return result
+
+def _comment_records(df, rows, comment_column='comentarios'):
+    """Monta os comentários (texto, data, sentimento e motivo) das linhas informadas do DataFrame"""
+    texts = df[comment_column].take(rows).astype(str).tolist()
+    dates = df['data_desligamento'].take(rows).dt.strftime('%Y-%m-%d').fillna('').tolist()
+    if 'sentimento' in df.columns:
+        sentiments = df['sentimento'].take(rows).astype(str).tolist()
+    else:
+        sentiments = [score_sentiment(text) for text in texts]
+    if 'Motivo_Desligamento' in df.columns:
+        categories = df['Motivo_Desligamento'].take(rows).astype(str).tolist()
+    else:
+        categories = [None] * len(rows)
     
-    # Treina o vetorizador
-    X = vectorizer.fit_transform(processed_comments)
+    return [
+        {
+            'id': int(row),
+            'date': date,
+            'text': text,
+            'length': len(text),
+            'sentiment': sentiment,
+            'category': category
+        }
+        for row, text, date, sentiment, category in zip(rows, texts, dates, sentiments, categories)
+    ]
+
+def _comment_rows(snapshot, period_type, period_value, comment_column='comentarios'):
+    """Linhas do snapshot (em ordem) com comentário no período; None se o período for inválido"""
+    period_rows = _period_positions(snapshot, period_type, period_value)
+    if period_rows is None:
+        return None
+    if comment_column not in snapshot.df.columns:
+        return np.array([], dtype=np.int64)
     
-    # Obtém as palavras e suas contagens
-    words = vectorizer.get_feature_names_out()
-    counts = X.sum(axis=0).A1
+    # A verificação de ausência usa apenas as linhas do período
+    if isinstance(period_rows, slice):
+        present = snapshot.df[comment_column].iloc[period_rows].notna().to_numpy()
+        return np.flatnonzero(present) + period_rows.start
+    present = snapshot.df[comment_column].notna().to_numpy()
+    return period_rows[present[period_rows]]
+
+def _parse_comment_cursor(snapshot, cursor):
+    """Converte o cursor (versão dos dados e última linha entregue) na linha a partir da qual continuar"""
+    if not cursor:
+        return -1
+    version, _, row = str(cursor).rpartition(':')
+    if not row.isdigit():
+        raise ValueError("cursor inválido")
+    if version != snapshot.version:
+        raise ValueError("o cursor pertence a outra versão dos dados; recomece a listagem")
+    return int(row)
+
+def get_comments_page(period_type, period_value, cursor=None, limit=COMMENTS_PAGE_SIZE):
+    """Retorna uma página de comentários do período e o cursor da próxima (None na última página)"""
+    limit = min(max(int(limit), 1), COMMENTS_MAX_PAGE_SIZE)
+    result = {'comments': [], 'next_cursor': None, 'total': 0, 'limit': limit}
     
-    # Cria um dicionário de palavras-chave e suas contagens
-    keywords = dict(zip(words, counts))
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return result
     
-    # Ordena por contagem (mais frequentes primeiro)
-    keywords = dict(sorted(keywords.items(), key=lambda item: item[1], reverse=True))
+    # Lança ValueError se o cursor for inválido ou de outra versão dos dados
+    last_row = _parse_comment_cursor(snapshot, cursor)
+    rows = _comment_rows(snapshot, period_type, period_value)
+    if rows is None:
+        return result
     
-    return keywords
+    # Continua logo após a última linha entregue (as linhas estão em ordem)
+    start = int(np.searchsorted(rows, last_row, side='right'))
+    page_rows = rows[start:start + limit]
+    result['total'] = int(len(rows))
+    result['comments'] = _comment_records(snapshot.df, page_rows)
+    if start + limit < len(rows):
+        result['next_cursor'] = f"{snapshot.version}:{int(page_rows[-1])}"
+    return result
+
+def iter_comments(period_type, period_value, batch_size=COMMENTS_STREAM_BATCH):
+    """Percorre todos os comentários do período em lotes, sempre sobre o mesmo snapshot"""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return
+    rows = _comment_rows(snapshot, period_type, period_value)
+    if rows is None:
+        return
+    for start in range(0, len(rows), batch_size):
+        yield from _comment_records(snapshot.df, rows[start:start + batch_size])
 
 def process_comments(df, comment_column='comentarios'):
     """Processa os comentários dos desligados"""
@@ -247,49 +1796,148 @@ def process_comments(df, comment_column='comentarios'):
         return []
     
     # Filtra apenas comentários não vazios
-    comments = df[comment_column].dropna().astype(str).tolist()
+    present = df[comment_column].notna()
+    texts = df[comment_column][present].astype(str)
+    comments = texts.tolist()
+    
+    # Usa o sentimento já calculado na carga, quando disponível (senão, classifica todos de uma vez)
+    if 'sentimento' in df.columns:
+        sentiments = df['sentimento'][present].astype(object).tolist()
+    else:
+        sentiments = score_sentiments(texts).astype(object).tolist()
     
     # Processa os comentários (simplificado para exemplo)
     processed = []
-    for comment in comments:
+    for comment, sentiment in zip(comments, sentiments):
         processed.append({
             'text': comment,
             'length': len(comment),
-            'sentiment': _simple_sentiment_analysis(comment)
+            'sentiment': sentiment
         })
     
     return processed
 
-def _simple_sentiment_analysis(text):
-    """Análise de sentimento simples baseada em palavras-chave"""
-    # Lista de palavras positivas e negativas em português
-    positive_words = [
-        'bom', 'ótimo', 'excelente', 'incrível', 'maravilhoso', 'fantástico',
-        'adorei', 'gostei', 'satisfeito', 'feliz', 'contente', 'positivo',
-        'recomendo', 'aprovado', 'agradável', 'melhor', 'tranquilo'
-    ]
-    
-    negative_words = [
-        'ruim', 'péssimo', 'terrível', 'horrível', 'detestei', 'odiei',
-        'decepcionado', 'insatisfeito', 'triste', 'infeliz', 'negativo',
-        'não recomendo', 'reprovado', 'desagradável', 'pior', 'estressante',
-        'problema', 'difícil', 'complicado', 'fraco', 'errado'
-    ]
-    
-    text_lower = text.lower()
+def _sentiment_score(words, matcher):
+    """Soma as polaridades dos termos do léxico presentes nas palavras do texto normalizado (cada termo conta uma vez)"""
+    matches = matcher['words'].intersection(words)
     
-    # Conta palavras positivas e negativas no texto
-    positive_count = sum(1 for word in positive_words if word in text_lower)
-    negative_count = sum(1 for word in negative_words if word in text_lower)
+    # Expressões (as mais longas antes), só quando aparece a primeira palavra de alguma delas:
+    # suas palavras não contam como termos isolados ('nao recomendo' não conta 'recomendo')
+    phrases = matcher['phrases']
+    if phrases is not None and not matcher['phrase_starts'].isdisjoint(words):
+        text = ' '.join(words)
+        found = phrases.findall(text)
+        if found:
+            matches = set(phrases.sub(' ', text).split()) & matcher['words']
+            matches.update(found)
     
-    # Define o sentimento com base na contagem
-    if positive_count > negative_count:
+    return sum(map(matcher['polarity'].__getitem__, matches))
+
+def _sentiment_label(score):
+    """Define o sentimento com base no saldo de termos positivos e negativos"""
+    if score > 0:
         return 'positive'
-    elif negative_count > positive_count:
+    elif score < 0:
         return 'negative'
     else:
         return 'neutral'
 
+def score_sentiment(text):
+    """Classifica um comentário em uma única passada do léxico compilado"""
+    return _sentiment_label(_sentiment_score(_normalized_words(text), _sentiment_matcher))
+
+def _arrow_sentiment_scores(texts, matcher):
+    """Calcula o saldo de sentimento de um array Arrow de textos normalizados com operações vetorizadas"""
+    terms, polarity = matcher['terms'], matcher['polarity']
+    scores = np.zeros(len(texts))
+    if not terms or len(texts) == 0:
+        return scores
+    
+    # Separa os textos normalizados em palavras
+    rows, words = _arrow_words(texts)
+    
+    # Identifica cada palavra no vocabulário do léxico (-1 para as demais); as palavras podem vir com o
+    # espaço que as separa da próxima, então o vocabulário também entra com ele
+    vocabulary = sorted({word for term in terms for word in term.split()})
+    word_ids = pyarrow.compute.index_in(
+        words, value_set=pyarrow.array(vocabulary + [f'{word} ' for word in vocabulary], type=words.type)
+    ).fill_null(-1).to_numpy()
+    word_ids = np.where(word_ids >= len(vocabulary), word_ids - len(vocabulary), word_ids)
+    word_index = {word: index for index, word in enumerate(vocabulary)}
+    
+    hit_rows, hit_terms = [], []
+    covered = np.zeros(len(word_ids), dtype=bool)
+    single_terms = np.full(len(vocabulary) + 1, -1)
+    for term_index, term in enumerate(terms):
+        words = [word_index[word] for word in term.split()]
+        if len(words) == 1:
+            single_terms[words[0]] = term_index
+            continue
+        
+        # Expressões: palavras consecutivas do mesmo comentário ainda não usadas por uma expressão maior
+        span = len(word_ids) - len(words) + 1
+        if span <= 0:
+            continue
+        found = np.ones(span, dtype=bool)
+        for offset, word in enumerate(words):
+            found &= (word_ids[offset:offset + span] == word) & ~covered[offset:offset + span]
+            found &= rows[offset:offset + span] == rows[:span]
+        positions = np.flatnonzero(found)
+        for offset in range(len(words)):
+            covered[positions + offset] = True
+        hit_rows.append(rows[positions])
+        hit_terms.append(np.full(len(positions), term_index))
+    
+    # Palavras isoladas que não fazem parte de uma expressão encontrada (o id -1 aponta para o último, -1)
+    term_ids = single_terms[word_ids]
+    single_hits = (term_ids >= 0) & ~covered
+    hit_rows.append(rows[single_hits])
+    hit_terms.append(term_ids[single_hits])
+    
+    # Cada termo conta uma única vez por comentário
+    hits = np.concatenate(hit_terms).astype(np.int64)
+    pairs = np.unique(np.concatenate(hit_rows).astype(np.int64) * len(terms) + hits)
+    term_polarity = np.array([polarity[term] for term in terms])
+    return np.bincount(pairs // len(terms), weights=term_polarity[pairs % len(terms)], minlength=len(texts))
+
+def score_sentiments(comments, normalized=None):
+    """Classifica uma série de comentários de uma vez (vazio para comentários ausentes)"""
+    matcher = _sentiment_matcher
+    
+    # Cada texto distinto é avaliado uma única vez (sem a normalização pronta, ela é feita só nos distintos)
+    if PYARROW_AVAILABLE:
+        encoded = _arrow_strings(comments if normalized is None else normalized).dictionary_encode()
+        texts = encoded.dictionary if normalized is not None else _arrow_normalize(encoded.dictionary)
+        codes = encoded.indices.fill_null(-1).to_numpy()
+        scores = _arrow_sentiment_scores(texts, matcher)
+    else:
+        if normalized is None:
+            normalized = normalize_comments(comments)
+        codes, texts = pd.factorize(normalized)
+        scores = np.array([_sentiment_score(text.split(), matcher) for text in texts])
+    
+    labels = np.where(scores > 0, 0, np.where(scores < 0, 1, 2)).astype(np.int8)
+    # O código -1 (comentário ausente) aponta para o último elemento, -1
+    labels = np.append(labels, np.int8(-1))
+    return pd.Series(pd.Categorical.from_codes(labels[codes], dtype=SENTIMENT_DTYPE), index=comments.index)
+
+def count_sentiments(df):
+    """Conta os comentários de cada sentimento, usando a coluna pré-calculada quando disponível"""
+    if df is None or df.empty or 'comentarios' not in df.columns:
+        return {label: 0 for label in SENTIMENT_LABELS}
+    if 'sentimento' in df.columns:
+        counts = df['sentimento'].value_counts()
+    else:
+        counts = Counter(comment['sentiment'] for comment in process_comments(df))
+    return {label: int(counts.get(label, 0)) for label in SENTIMENT_LABELS}
+
+def get_sentiment_counts(analysis_data):
+    """Retorna a contagem de sentimentos de uma análise"""
+    if 'sentiment_counts' in analysis_data:
+        return analysis_data['sentiment_counts']
+    counts = Counter(comment['sentiment'] for comment in analysis_data['comments'])
+    return {label: counts.get(label, 0) for label in SENTIMENT_LABELS}
+
 def generate_insights(analysis_data):
     """Gera insights com base nos dados analisados"""
     if analysis_data is None:
@@ -310,8 +1958,8 @@ def generate_insights(analysis_data):
             insights[area] = f"A área de {area} apresenta baixo nível de satisfação, com média {mean_score:.1f}. Requer atenção."
     
     # Adiciona insight sobre comentários
-    sentiment_counts = Counter([c['sentiment'] for c in analysis_data['comments']])
-    total_comments = len(analysis_data['comments'])
+    sentiment_counts = get_sentiment_counts(analysis_data)
+    total_comments = sum(sentiment_counts.values())
     
     if total_comments > 0:
         positive_percent = (sentiment_counts.get('positive', 0) / total_comments) * 100
@@ -343,8 +1991,8 @@ def generate_alerts(analysis_data, threshold=3.0):
             })
     
     # Verifica comentários negativos
-    sentiment_counts = Counter([c['sentiment'] for c in analysis_data['comments']])
-    total_comments = len(analysis_data['comments'])
+    sentiment_counts = get_sentiment_counts(analysis_data)
+    total_comments = sum(sentiment_counts.values())
     
     if total_comments > 0:
         negative_percent = (sentiment_counts.get('negative', 0) / total_comments) * 100
@@ -367,10 +2015,12 @@ def generate_alerts(analysis_data, threshold=3.0):
 def export_to_csv(period_type, period_value):
     """Exporta os dados para um arquivo CSV"""
     try:
-        df = load_data()
+        snapshot = get_snapshot()
+        if snapshot is None:
+            return None
         
         # Filtra os dados para o período específico
-        filtered_df = filter_by_period(df, period_type, period_value)
+        filtered_df = filter_by_period(snapshot.df, period_type, period_value, snapshot.index)
         
         if filtered_df is None or filtered_df.empty:
             return None
@@ -394,10 +2044,12 @@ def export_to_csv(period_type, period_value):
 def export_to_excel(period_type, period_value):
     """Exporta os dados para um arquivo XLSX com múltiplas abas"""
     try:
-        df = load_data()
+        snapshot = get_snapshot()
+        if snapshot is None:
+            return None
         
         # Filtra os dados para o período específico
-        filtered_df = filter_by_period(df, period_type, period_value)
+        filtered_df = filter_by_period(snapshot.df, period_type, period_value, snapshot.index)
         
         if filtered_df is None or filtered_df.empty:
             return None
@@ -415,13 +2067,14 @@ def export_to_excel(period_type, period_value):
             filtered_df.to_excel(writer, sheet_name='Dados Gerais', index=False)
             
             # Aba com estatísticas por área
+            area_stats = compute_area_statistics(filtered_df)
             stats_df = pd.DataFrame({
                 'Area': AREAS,
-                'Media': [filtered_df[area].mean() if area in filtered_df.columns else None for area in AREAS],
-                'Mediana': [filtered_df[area].median() if area in filtered_df.columns else None for area in AREAS],
-                'Desvio Padrao': [filtered_df[area].std() if area in filtered_df.columns else None for area in AREAS],
-                'Minimo': [filtered_df[area].min() if area in filtered_df.columns else None for area in AREAS],
-                'Maximo': [filtered_df[area].max() if area in filtered_df.columns else None for area in AREAS]
+                'Media': [area_stats[area]['mean'] if area in area_stats else None for area in AREAS],
+                'Mediana': [area_stats[area]['median'] if area in area_stats else None for area in AREAS],
+                'Desvio Padrao': [area_stats[area]['std'] if area in area_stats else None for area in AREAS],
+                'Minimo': [area_stats[area]['min'] if area in area_stats else None for area in AREAS],
+                'Maximo': [area_stats[area]['max'] if area in area_stats else None for area in AREAS]
             })
             stats_df.to_excel(writer, sheet_name='Estatisticas', index=False)
             
@@ -431,7 +2084,7 @@ def export_to_excel(period_type, period_value):
                 comments_df.to_excel(writer, sheet_name='Comentarios', index=False)
             
             # Aba com palavras-chave
-            keywords = extract_keywords(filtered_df)
+            keywords = _snapshot_keywords(snapshot, filtered_df)
             keywords_df = pd.DataFrame(list(keywords.items()), columns=['Palavra', 'Frequencia'])
             keywords_df.to_excel(writer, sheet_name='Palavras-Chave', index=False)
         
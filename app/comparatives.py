@@ -43,9 +43,9 @@ INSIGHT_PHRASES = {
 
 def compare_periods(period1_type, period1_value, period2_type, period2_value):
     """Compara dois períodos e retorna as diferenças"""
-    # Obtém análises dos dois períodos
-    analysis1 = analytics.analyze_period(period1_type, period1_value)
-    analysis2 = analytics.analyze_period(period2_type, period2_value)
+    # Obtém as estatísticas pré-calculadas dos dois períodos
+    analysis1 = analytics.get_period_statistics(period1_type, period1_value)
+    analysis2 = analytics.get_period_statistics(period2_type, period2_value)
     
     # Verifica se há dados para ambos os períodos
     if analysis1 is None or analysis2 is None:
@@ -8,12 +8,14 @@ Backend principal da aplicação utilizando Flask
 import os
 import json
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, jsonify, send_file, send_from_directory, flash
+from flask import Flask, render_template, request, redirect, url_for, jsonify, send_file, send_from_directory, flash, \
+    Response, stream_with_context
 import pandas as pd
-from . import analytics, visualizations, comparatives, report_generator
+from . import analytics, visualizations, comparatives, report_generator, storage
 import glob
 from werkzeug.utils import secure_filename
 import os.path
+import threading
 from datetime import datetime
 
 # Configuração da aplicação Flask
@@ -24,22 +26,75 @@ app = Flask(__name__,
 # Definir uma chave secreta para o aplicativo
 app.config['SECRET_KEY'] = 'analise_software_2025_desligamentos_key'
 
+# Limpeza periódica dos arquivos gerados (desativada com STORAGE_SWEEPER=0 e nunca iniciada nos testes)
+app.config['STORAGE_SWEEPER'] = os.environ.get('STORAGE_SWEEPER', '1') != '0'
+
 # Definição dos períodos disponíveis
 PERIODS = {
     'month': 'Mensal',
     'quarter': 'Trimestral',
     'semester': 'Semestral',
     'year': 'Anual',
-    'all': 'Todos os Períodos'
+    'all': 'Todos os Períodos',
+    'range': 'Intervalo de Datas'
 }
 
+def _requested_date_range(source, prefix=''):
+    """Retorna o valor do período 'range' quando a requisição informa datas de início e/ou fim (ou None)"""
+    start = source.get(f'{prefix}start')
+    end = source.get(f'{prefix}end')
+    if not start and not end:
+        return None
+    # Lança ValueError se alguma das datas for inválida
+    return analytics.format_date_range(start, end)
+
+def _requested_period(source):
+    """Retorna (tipo, valor) do período pedido, com start/end tendo precedência (padrão: todos os períodos)"""
+    # Lança ValueError se alguma das datas ou o período forem inválidos
+    date_range = _requested_date_range(source)
+    if date_range is not None:
+        return 'range', date_range
+    return analytics.validate_period(source.get('period_type', 'all'), source.get('period_value', 'all'))
+
+# Cabeçalho dos arquivos com impressão digital no nome: o conteúdo de uma URL nunca muda
+IMMUTABLE_CACHE_MAX_AGE = 365 * 24 * 3600
+
+@app.context_processor
+def inject_plotly_bundle():
+    """Disponibiliza aos templates a URL do Plotly.js local"""
+    return {'plotly_js_url': url_for('vendor_file', filename=visualizations.plotly_bundle())}
+
+@app.route('/vendor/<filename>')
+def vendor_file(filename):
+    """Rota que serve o Plotly.js local com cache de longa duração"""
+    if filename != visualizations.plotly_bundle():
+        return jsonify({"status": "error", "message": "Arquivo não encontrado"}), 404
+    
+    response = send_from_directory(visualizations.VENDOR_DIR, filename,
+                                   mimetype='text/javascript', max_age=IMMUTABLE_CACHE_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_CACHE_MAX_AGE}, immutable'
+    return response
+
+def _chart_url(period_type, period_value):
+    """Retorna a URL de /chart/<período>/<tipo> do período, com '__kind__' no lugar do tipo do gráfico"""
+    return url_for('chart', period=f'{period_type}:{period_value}', kind='__kind__')
+
+# Garante que a inicialização rode uma única vez mesmo com requisições simultâneas
+_init_lock = threading.Lock()
+
 # Inicialização dos dados ao carregar o aplicativo
 @app.before_request
 def initialize_if_needed():
     """Inicializa o aplicativo carregando os dados disponíveis se ainda não estiverem carregados"""
-    if not hasattr(app, 'initialized'):
-        analytics.load_data()
-        app.initialized = True
+    if getattr(app, 'initialized', False):
+        return
+    with _init_lock:
+        if not getattr(app, 'initialized', False):
+            analytics.load_data()
+            # Inicia a limpeza periódica de gráficos, relatórios e exportações antigos
+            if app.config['STORAGE_SWEEPER'] and not app.config['TESTING']:
+                storage.start_sweeper()
+            app.initialized = True
 
 @app.route('/')
 def index():
@@ -75,12 +130,14 @@ def index():
     # Gerar dados de análise para o período selecionado
     analysis_data = analytics.analyze_period(period_name, period_value)
     
-    # Gerar gráficos para o período selecionado
-    charts = visualizations.generate_charts(analysis_data, period_name, period_value)
+    # Apenas os gráficos já em cache vão no lote da página; os demais são pedidos pelo navegador sob demanda
+    charts = visualizations.generate_chart_specs(analysis_data, cached_only=True)
     
     return render_template('index.html', 
                           analysis=analysis_data, 
                           charts=charts, 
+                          chart_specs=visualizations.chart_specs_json(charts),
+                          chart_url=_chart_url(period_name, period_value),
                           available_periods=available_periods,
                           period_name=period_name,
                           period_value=period_value)
@@ -91,9 +148,22 @@ def analyze():
     # Obter os períodos disponíveis
     available_periods = analytics.get_available_periods()
     
-    if request.method == 'POST':
+    # Intervalo de datas informado por início/fim (ex.: ?start=2024-01-01&end=2024-03-31)
+    try:
+        date_range = _requested_date_range(request.values)
+    except ValueError as e:
+        flash(f'Intervalo de datas inválido: {str(e)}', 'error')
+        return redirect(url_for('analyze'))
+    
+    if date_range is not None:
+        period_type = 'range'
+        period_value = date_range
+    elif request.method == 'POST':
         period_type = request.form.get('period_type', 'all')
         period_value = request.form.get('period_value', 'all')
+    elif request.args.get('period_type') == 'range':
+        period_type = 'range'
+        period_value = request.args.get('period_value', '_')
     else:  # GET
         # Usar parâmetros da URL ou valores padrão
         period_type = request.args.get('period_type', 'year')
@@ -115,8 +185,8 @@ def analyze():
     # Gera análises para o período selecionado
     analysis_data = analytics.analyze_period(period_type, period_value)
     
-    # Gera visualizações para o período
-    charts_paths = visualizations.generate_charts(analysis_data, period_type, period_value)
+    # Especificações dos gráficos já em cache; os demais são pedidos pelo navegador sob demanda
+    charts = visualizations.generate_chart_specs(analysis_data, cached_only=True)
     
     # Gera insights automáticos
     insights = analytics.generate_insights(analysis_data)
@@ -130,7 +200,9 @@ def analyze():
                           periods=PERIODS,
                           available_periods=available_periods,
                           analysis=analysis_data,
-                          charts=charts_paths,
+                          charts=charts,
+                          chart_specs=visualizations.chart_specs_json(charts),
+                          chart_url=_chart_url(period_type, period_value),
                           insights=insights,
                           alerts=alerts)
 
@@ -150,14 +222,26 @@ def compare_periods():
     period2_type = request.form.get('period2_type')
     period2_value = request.form.get('period2_value')
     
+    # Cada período pode ser um intervalo de datas (period1_start/period1_end, period2_start/period2_end)
+    try:
+        date_range1 = _requested_date_range(request.form, 'period1_')
+        date_range2 = _requested_date_range(request.form, 'period2_')
+    except ValueError as e:
+        flash(f'Intervalo de datas inválido: {str(e)}', 'error')
+        return redirect(url_for('compare'))
+    if date_range1 is not None:
+        period1_type, period1_value = 'range', date_range1
+    if date_range2 is not None:
+        period2_type, period2_value = 'range', date_range2
+    
     # Realiza a comparação entre os períodos selecionados
     comparison_data = comparatives.compare_periods(
         period1_type, period1_value, 
         period2_type, period2_value
     )
     
-    # Gera visualizações comparativas
-    charts_paths = visualizations.generate_comparison_charts(comparison_data)
+    # Gera as especificações dos gráficos comparativos (renderizados no navegador)
+    charts = visualizations.generate_comparison_chart_specs(comparison_data)
     
     # Gera insights para comparação
     insights = comparatives.generate_comparison_insights(comparison_data)
@@ -167,9 +251,70 @@ def compare_periods():
                           period2=(period2_type, period2_value),
                           periods=PERIODS,
                           comparison=comparison_data,
-                          charts=charts_paths,
+                          charts=charts,
+                          chart_specs=visualizations.chart_specs_json(charts),
                           insights=insights)
 
+@app.route('/chart/<period>/<kind>')
+def chart(period, kind):
+    """Rota que gera sob demanda (e mantém em cache) a especificação JSON de um gráfico (período: tipo:valor)"""
+    if kind not in visualizations.CHART_KINDS:
+        return jsonify({"status": "error", "message": f"Tipo de gráfico desconhecido: {kind}"}), 404
+    
+    period_type, _, period_value = period.partition(':')
+    try:
+        if not period_type or not period_value:
+            raise ValueError("use tipo:valor (ex.: year:2024)")
+        period_type, period_value = analytics.validate_period(period_type, period_value)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Período inválido: {str(e)}"}), 400
+    
+    analysis_data = analytics.analyze_period(period_type, period_value)
+    spec = visualizations.generate_chart_spec(analysis_data, kind)
+    if spec is None:
+        return jsonify({"status": "error", "message": "Gráfico não disponível para o período"}), 404
+    
+    # A especificação muda com a versão dos dados: o navegador revalida pelo ETag
+    response = Response(spec, mimetype='application/json')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.route('/api/charts')
+def chart_specs():
+    """Rota que retorna, em um único lote JSON, as especificações plotly de todos os gráficos do período"""
+    try:
+        period_type, period_value = _requested_period(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    analysis_data = analytics.analyze_period(period_type, period_value)
+    if analysis_data is None:
+        return jsonify({"status": "error", "message": "Nenhum dado disponível para o período"}), 404
+    
+    specs = visualizations.generate_chart_specs(analysis_data)
+    return Response(visualizations.chart_specs_json(specs), mimetype='application/json')
+
+@app.route('/api/charts/compare')
+def comparison_chart_specs():
+    """Rota que retorna, em um único lote JSON, as especificações dos gráficos comparativos de dois períodos"""
+    try:
+        date_range1 = _requested_date_range(request.args, 'period1_')
+        date_range2 = _requested_date_range(request.args, 'period2_')
+        period1 = ('range', date_range1) if date_range1 is not None else analytics.validate_period(
+            request.args.get('period1_type', 'all'), request.args.get('period1_value', 'all'))
+        period2 = ('range', date_range2) if date_range2 is not None else analytics.validate_period(
+            request.args.get('period2_type', 'all'), request.args.get('period2_value', 'all'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    comparison_data = comparatives.compare_periods(*period1, *period2)
+    if comparison_data is None:
+        return jsonify({"status": "error", "message": "Não foi possível comparar os períodos"}), 404
+    
+    specs = visualizations.generate_comparison_chart_specs(comparison_data)
+    return Response(visualizations.chart_specs_json(specs), mimetype='application/json')
+
 @app.route('/generate_report', methods=['POST'])
 def generate_report():
     """Rota para gerar relatório PDF"""
@@ -177,6 +322,11 @@ def generate_report():
         period_type = request.form.get('period_type', 'all')
         period_value = request.form.get('period_value', 'all')
         
+        # Intervalo de datas informado por início/fim
+        date_range = _requested_date_range(request.form)
+        if date_range is not None:
+            period_type, period_value = 'range', date_range
+        
         # Gera o relatório
         file_path = report_generator.generate_pdf_report(period_type, period_value)
         
@@ -211,6 +361,11 @@ def export_data():
         period_value = request.form.get('period_value', 'all')
         export_format = request.form.get('format', 'csv')
         
+        # Intervalo de datas informado por início/fim
+        date_range = _requested_date_range(request.form)
+        if date_range is not None:
+            period_type, period_value = 'range', date_range
+        
         if export_format == 'csv':
             file_path = analytics.export_to_csv(period_type, period_value)
             mimetype = 'text/csv'
@@ -274,41 +429,108 @@ def comments():
     if period_value not in available_periods[period_name]:
         period_value = available_periods[period_name][0]
     
-    # Gerar dados de análise para o período selecionado
-    analysis_data = analytics.analyze_period(period_name, period_value)
+    # Busca nos comentários do período, quando informada (ex.: ?q="gestão de pessoas" liderança)
+    query = request.args.get('q', '').strip()
+    search_results = None
+    comments_page = None
+    if query:
+        page = request.args.get('page', '1')
+        search_results = analytics.search_comments(query, period_name, period_value, int(page) if page.isdigit() else 1)
+    else:
+        # Apenas uma página de comentários por vez; as seguintes são pedidas com o cursor
+        try:
+            comments_page = analytics.get_comments_page(period_name, period_value, request.args.get('cursor'))
+        except ValueError as e:
+            flash(f'Não foi possível continuar a listagem: {str(e)}', 'error')
+            comments_page = analytics.get_comments_page(period_name, period_value)
     
     return render_template('comments.html', 
-                          analysis=analysis_data, 
+                          comments_page=comments_page, 
                           available_periods=available_periods,
                           period_name=period_name,
-                          period_value=period_value)
+                          period_value=period_value,
+                          query=query,
+                          search=search_results,
+                          cursor=request.args.get('cursor'))
+
+@app.route('/search')
+def search_comments():
+    """Rota de busca nos comentários (JSON): termos e expressões entre aspas, filtro de período e paginação"""
+    query = request.args.get('q', '').strip()
+    
+    try:
+        # Intervalo de datas informado por início/fim (ex.: ?start=2024-01-01&end=2024-03-31)
+        period_type, period_value = _requested_period(request.args)
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', analytics.SEARCH_PAGE_SIZE))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Parâmetros inválidos: {str(e)}"}), 400
+    
+    results = analytics.search_comments(query, period_type, period_value, page, per_page)
+    return jsonify({"status": "success", **results})
+
+@app.route('/comments/data')
+def comments_data():
+    """Rota com uma página de comentários em JSON (paginação por cursor: ?cursor=<next_cursor da página anterior>)"""
+    try:
+        period_type, period_value = _requested_period(request.args)
+        limit = int(request.args.get('limit', analytics.COMMENTS_PAGE_SIZE))
+        page = analytics.get_comments_page(period_type, period_value, request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Parâmetros inválidos: {str(e)}"}), 400
+    
+    return jsonify({"status": "success", **page})
+
+@app.route('/comments/stream')
+def comments_stream():
+    """Rota que transmite todos os comentários do período em NDJSON (um objeto JSON por linha)"""
+    try:
+        period_type, period_value = _requested_period(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Parâmetros inválidos: {str(e)}"}), 400
+    
+    def generate():
+        for comment in analytics.iter_comments(period_type, period_value):
+            yield json.dumps(comment, ensure_ascii=False) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 @app.route('/export')
 def export_report():
     # Obter os períodos disponíveis
     available_periods = analytics.get_available_periods()
     
-    # Obter os parâmetros da requisição
-    period_name = request.args.get('period_type', 'year')
-    
-    # Verificar se o tipo de período solicitado está disponível
-    if period_name not in available_periods or not available_periods[period_name]:
-        # Tentar usar um período alternativo se o solicitado não estiver disponível
-        for p_type in ['year', 'month', 'week']:
-            if p_type in available_periods and available_periods[p_type]:
-                period_name = p_type
-                break
-        else:
-            # Se nenhum período estiver disponível
-            return redirect(url_for('index'))
-    
-    # Obter o valor do período selecionado
-    period_value = request.args.get('period_value', available_periods[period_name][0])
-    
-    # Verificar se o valor do período está disponível
-    if period_value not in available_periods[period_name]:
-        period_value = available_periods[period_name][0]
+    # Intervalo de datas informado por início/fim (ex.: ?start=2024-01-01&end=2024-03-31)
+    try:
+        date_range = _requested_date_range(request.args)
+    except ValueError as e:
+        flash(f'Intervalo de datas inválido: {str(e)}', 'error')
+        return redirect(url_for('index'))
     
+    if date_range is not None:
+        period_name, period_value = 'range', date_range
+    else:
+        # Obter os parâmetros da requisição
+        period_name = request.args.get('period_type', 'year')
+        
+        # Verificar se o tipo de período solicitado está disponível
+        if period_name not in available_periods or not available_periods[period_name]:
+            # Tentar usar um período alternativo se o solicitado não estiver disponível
+            for p_type in ['year', 'month', 'week']:
+                if p_type in available_periods and available_periods[p_type]:
+                    period_name = p_type
+                    break
+            else:
+                # Se nenhum período estiver disponível
+                return redirect(url_for('index'))
+        
+        # Obter o valor do período selecionado
+        period_value = request.args.get('period_value', available_periods[period_name][0])
+        
+        # Verificar se o valor do período está disponível
+        if period_value not in available_periods[period_name]:
+            period_value = available_periods[period_name][0]
+        
     # Gerar dados de análise para o período selecionado
     analysis_data = analytics.analyze_period(period_name, period_value)
     
@@ -319,7 +541,7 @@ def export_report():
     report_file = visualizations.generate_report(analysis_data, charts, period_name, period_value)
     
     if report_file and os.path.exists(report_file):
-        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         filename = f"relatorio_{period_name}_{period_value}_{timestamp}.pdf"
         return send_file(report_file, 
                         as_attachment=True, 
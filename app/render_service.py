@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo para renderizar as nuvens de palavras em processos isolados
+
+As imagens são geradas diretamente pelo WordCloud (Pillow), sem matplotlib nem o estado global
+do pyplot, e gravadas em PNG junto de uma página HTML que as exibe. A renderização roda em um
+pequeno pool de processos; se ele estiver desativado ou falhar, a mesma função roda no processo
+atual, o que é seguro entre threads porque cada chamada usa apenas objetos próprios.
+"""
+
+import os
+import random
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from wordcloud import WordCloud
+from . import storage
+
+# Diretório dos gráficos gerados (o mesmo usado pelo módulo de visualizações)
+CHARTS_DIR = os.path.join(storage.STATIC_DIR, 'charts')
+
+# Número de processos de renderização (0 renderiza no próprio processo)
+RENDER_PROCESSES = int(os.environ.get('CHART_RENDER_PROCESSES', 2))
+_pool = None
+_pool_lock = threading.Lock()
+
+# Fator de escala da imagem em relação ao tamanho da nuvem (resolução para telas e relatórios)
+IMAGE_SCALE = 1.5
+
+# Palavras de exemplo relacionadas a feedback de funcionários
+EXAMPLE_WORDS = (
+    "satisfação trabalho equipe liderança comunicação benefícios salário horário flexibilidade "
+    "ambiente cultura empresa desenvolvimento carreira oportunidade crescimento reconhecimento "
+    "feedback gestor relacionamento colegas projetos desafios motivação engajamento "
+    "propósito valores missão visão estratégia inovação tecnologia ferramentas processos "
+    "burocracia autonomia responsabilidade confiança transparência respeito diversidade "
+    "inclusão bem-estar qualidade vida equilíbrio"
+).split()
+
+def _white(*args, **kwargs):
+    """Cor de todas as palavras da nuvem"""
+    return (255, 255, 255)
+
+def _save_image(image, filename):
+    """Grava a imagem em PNG e a página HTML que a exibe; retorna o caminho relativo a static"""
+    png_name = filename.replace('.html', '.png')
+    png_path = os.path.join(CHARTS_DIR, png_name)
+    html_path = os.path.join(CHARTS_DIR, filename)
+
+    # Escreve em arquivos temporários e renomeia para que a imagem nunca seja lida pela metade
+    temp_path = f"{png_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    image.save(temp_path, format='PNG', optimize=True)
+    os.replace(temp_path, png_path)
+
+    html_content = f'''
+        <html>
+        <head>
+            <style>
+                body {{ margin: 0; padding: 0; background: transparent; }}
+                img {{ width: 100%; height: 100%; object-fit: contain; }}
+            </style>
+        </head>
+        <body>
+            <img src="{png_name}" alt="Wordcloud">
+        </body>
+        </html>
+        '''
+    temp_path = f"{html_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    os.replace(temp_path, html_path)
+
+    return os.path.join('charts', filename)
+
+def render_wordcloud(frequencies, filename):
+    """Renderiza a nuvem de palavras das frequências indicadas no arquivo informado"""
+    try:
+        wc = WordCloud(
+            width=900,
+            height=450,
+            background_color='#303030',
+            max_words=50,
+            min_font_size=10,
+            max_font_size=60,
+            prefer_horizontal=0.7,
+            relative_scaling=0.5,
+            scale=IMAGE_SCALE,
+            color_func=_white
+        ).generate_from_frequencies(frequencies)
+        return _save_image(wc.to_image(), filename)
+    except Exception as e:
+        print(f"Erro ao gerar nuvem de palavras: {str(e)}")
+        return None
+
+def render_example_wordcloud(filename):
+    """Renderiza a nuvem de palavras de exemplo (frequências simuladas) no arquivo informado"""
+    rng = random.Random()
+    frequencies = {word: rng.randint(5, 30) for word in EXAMPLE_WORDS}
+    try:
+        wc = WordCloud(
+            width=800,
+            height=400,
+            background_color='white',
+            colormap='viridis',
+            max_words=100,
+            scale=IMAGE_SCALE,
+            random_state=rng
+        ).generate_from_frequencies(frequencies)
+        return _save_image(wc.to_image(), filename)
+    except Exception as e:
+        print(f"Erro ao gerar nuvem de palavras de exemplo: {str(e)}")
+        return None
+
+def _warm_up():
+    """Tarefa vazia: força a importação deste módulo (wordcloud, Pillow) no processo de renderização"""
+    return os.getpid()
+
+def _pool_context():
+    """Contexto dos processos de renderização, que não herdam locks e threads do servidor
+
+    Com 'forkserver', um processo servidor importa apenas este módulo (wordcloud, Pillow) e cada
+    processo de renderização é uma cópia dele; sem o aplicativo (Flask, pandas, scikit-learn).
+    Onde não há 'forkserver' (Windows), usa 'spawn'.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__name__])
+    return context
+
+def _get_pool():
+    """Retorna o pool de processos, criado sob demanda; None se estiver desativado"""
+    global _pool
+    with _pool_lock:
+        if _pool is None and RENDER_PROCESSES > 0:
+            _pool = ProcessPoolExecutor(max_workers=RENDER_PROCESSES, mp_context=_pool_context())
+            for _ in range(RENDER_PROCESSES):
+                _pool.submit(_warm_up)
+        return _pool
+
+def disable_pool(reason):
+    """Descarta o pool de processos após uma falha; as imagens passam a ser geradas no processo atual"""
+    global _pool, RENDER_PROCESSES
+    print(f"Pool de renderização indisponível, gerando no processo atual: {reason}")
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        RENDER_PROCESSES = 0
+
+def submit(func, *args):
+    """Agenda `func(*args)` no pool de processos; retorna o Future ou None se o pool estiver indisponível"""
+    pool = _get_pool()
+    if pool is None:
+        return None
+    try:
+        return pool.submit(func, *args)
+    except BrokenProcessPool as e:
+        disable_pool(str(e))
+        return None
+
+def render(func, *args):
+    """Executa `func(*args)` em um processo de renderização e aguarda o resultado (ou no processo atual)"""
+    future = submit(func, *args)
+    if future is None:
+        return func(*args)
+    try:
+        return future.result()
+    except BrokenProcessPool as e:
+        disable_pool(str(e))
+        return func(*args)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo para compartilhar os dados carregados entre os workers do gunicorn
+
+Apenas o processo que publica uma geração lê os arquivos CSV: ele grava as colunas numéricas
+(notas, data e período) em arquivos .npy e as demais (textos e categorias) em um arquivo Arrow.
+Os outros workers não leem os CSVs; apenas mapeiam esses arquivos em memória (somente leitura),
+de modo que as páginas ficam uma única vez no cache do sistema operacional. Um contador de
+geração avisa os workers quando outro processo recarregou os dados.
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+# O bloqueio entre processos usa fcntl (disponível apenas em sistemas POSIX)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# As colunas de texto e categorias são gravadas e mapeadas no formato Arrow
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+# Diretório dos arquivos compartilhados; o modo só é ativado quando a variável é definida
+# (ex.: SHARED_DATASET_DIR=/dev/shm/analise-desligamento)
+SHARED_DIR = os.environ.get('SHARED_DATASET_DIR')
+
+# Geração atualmente mapeada por este processo e estado do arquivo de geração lido por último
+_mapped_generation = None
+_generation_stat = None
+_generation_info = (0, None)
+
+def is_enabled():
+    """Indica se o modo de dados compartilhados está ativo"""
+    return bool(SHARED_DIR) and fcntl is not None and pyarrow is not None
+
+def _generation_file():
+    return os.path.join(SHARED_DIR, 'generation.json')
+
+def read_generation():
+    """Retorna (número da geração publicada, versão dos dados) ou (0, None) se não houver"""
+    global _generation_stat, _generation_info
+    try:
+        stat = os.stat(_generation_file())
+    except OSError:
+        return 0, None
+
+    # Só relê o arquivo quando ele mudou
+    key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    if key != _generation_stat:
+        try:
+            with open(_generation_file(), 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            _generation_info = (info['generation'], info['version'])
+            _generation_stat = key
+        except (OSError, ValueError, KeyError):
+            return 0, None
+    return _generation_info
+
+def is_stale():
+    """Indica se outro processo publicou uma geração diferente da mapeada por este processo"""
+    return is_enabled() and _mapped_generation is not None and read_generation()[0] != _mapped_generation
+
+def _is_numeric(series):
+    """Indica se a coluna é um array numpy de tipo fixo (gravada em .npy e mapeada sem cópia)"""
+    return isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufM'
+
+def _write_generation(tables, version, generation):
+    """Grava as tabelas em um novo diretório de geração e publica o contador"""
+    generation_dir = os.path.join(SHARED_DIR, f'gen-{generation}')
+    os.makedirs(generation_dir, exist_ok=True)
+
+    layout = {}
+    for name, df in tables.items():
+        columns = list(df.columns)
+        numeric = [column for column in columns if _is_numeric(df[column])]
+        for position, column in enumerate(columns):
+            if column in numeric:
+                np.save(os.path.join(generation_dir, f'{name}-{position}.npy'), df[column].to_numpy())
+
+        # Textos e categorias em um único arquivo Arrow, com um bloco por coluna (mapeado sem cópia)
+        others = [column for column in columns if column not in numeric]
+        if others:
+            table = pyarrow.Table.from_pandas(df[others], preserve_index=False).combine_chunks()
+            with pyarrow.OSFile(os.path.join(generation_dir, f'{name}.arrow'), 'wb') as sink:
+                with pyarrow.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        layout[name] = {'rows': len(df), 'columns': columns, 'numeric': numeric}
+
+    with open(os.path.join(generation_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'tables': layout}, f)
+
+    # Publica a nova geração de forma atômica
+    temp_path = f"{_generation_file()}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'generation': generation, 'version': version}, f)
+    os.replace(temp_path, _generation_file())
+
+    # Gerações antigas podem ser removidas: mapeamentos abertos continuam válidos
+    for name in os.listdir(SHARED_DIR):
+        if name.startswith('gen-') and name != f'gen-{generation}':
+            shutil.rmtree(os.path.join(SHARED_DIR, name), ignore_errors=True)
+
+def _string_types(arrow_type):
+    """Mantém as colunas de texto Arrow como strings do pandas baseadas em Arrow (sem criar objetos Python)"""
+    if arrow_type in (pyarrow.string(), pyarrow.large_string()):
+        return pd.StringDtype('pyarrow')
+    return None
+
+def _map_generation(generation, version):
+    """Mapeia as tabelas de uma geração publicada; retorna {nome: DataFrame} ou None se não corresponder à versão"""
+    generation_dir = os.path.join(SHARED_DIR, f'gen-{generation}')
+    with open(os.path.join(generation_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta['version'] != version:
+        print("Dados compartilhados não correspondem à versão local; usando cópia local")
+        return None
+
+    tables = {}
+    for name, layout in meta['tables'].items():
+        arrow_path = os.path.join(generation_dir, f'{name}.arrow')
+        arrow_table = None
+        if len(layout['numeric']) < len(layout['columns']):
+            arrow_table = pyarrow.ipc.open_file(pyarrow.memory_map(arrow_path, 'r')).read_all()
+
+        # Monta o DataFrame coluna a coluna, sem consolidar blocos (o que copiaria os dados)
+        data = {}
+        for position, column in enumerate(layout['columns']):
+            if column in layout['numeric']:
+                data[column] = np.load(os.path.join(generation_dir, f'{name}-{position}.npy'), mmap_mode='r')
+            else:
+                data[column] = arrow_table.column(column).to_pandas(types_mapper=_string_types)
+        df = pd.DataFrame(data, columns=layout['columns'], copy=False)
+        if len(df) != layout['rows']:
+            print("Dados compartilhados incompletos; usando cópia local")
+            return None
+        tables[name] = df
+    return tables
+
+def load_shared(version, build):
+    """Retorna as tabelas ({nome: DataFrame}) da versão dos dados, mapeadas dos arquivos compartilhados
+
+    Se a versão ainda não foi publicada, apenas este processo chama `build()`, grava as tabelas
+    retornadas e passa a usar as cópias mapeadas (as tabelas locais são descartadas). Retorna {}
+    quando `build()` não encontra dados e None se o modo estiver desativado ou falhar.
+    """
+    global _mapped_generation
+    if not is_enabled():
+        return None
+
+    try:
+        os.makedirs(SHARED_DIR, exist_ok=True)
+        with open(os.path.join(SHARED_DIR, '.lock'), 'a+') as lock:
+            # Apenas um processo lê os arquivos e grava; os demais esperam e mapeiam a geração publicada
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                generation, published_version = read_generation()
+                if published_version != version:
+                    tables = build()
+                    if not tables:
+                        return {}
+                    generation += 1
+                    _write_generation(tables, version, generation)
+                    del tables
+                    read_generation()
+
+                # Mapeia ainda com o bloqueio: outro processo não pode publicar e remover esta geração antes
+                tables = _map_generation(generation, version)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        if tables is not None:
+            _mapped_generation = generation
+        return tables
+    except Exception as e:
+        print(f"Erro ao compartilhar dados entre processos: {str(e)}")
+        return None
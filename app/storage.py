@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo para controle do espaço em disco dos arquivos gerados (gráficos, relatórios e exportações)
+"""
+
+import os
+import threading
+import time
+
+# A escolha do processo responsável pela limpeza usa fcntl (disponível apenas em sistemas POSIX)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Diretório base dos arquivos estáticos
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+
+# Limites padrão por diretório: orçamento em bytes e tempo de vida em segundos
+STORAGE_LIMITS = {
+    'charts': {'max_bytes': 200 * 1024 * 1024, 'ttl': 7 * 24 * 3600},
+    'reports': {'max_bytes': 100 * 1024 * 1024, 'ttl': 24 * 3600},
+    'exports': {'max_bytes': 100 * 1024 * 1024, 'ttl': 3600}
+}
+
+# Intervalo padrão (em segundos) entre as varreduras em segundo plano
+SWEEP_INTERVAL = int(os.environ.get('STORAGE_SWEEP_INTERVAL', 600))
+
+# Arquivos temporários (*.tmp) ainda podem estar sendo escritos: só são removidos depois deste prazo (segundos)
+TEMP_FILE_GRACE = int(os.environ.get('STORAGE_TEMP_FILE_GRACE', 3600))
+
+# Arquivo de bloqueio que elege um único processo (entre os workers) para executar a limpeza
+SWEEPER_LOCK_FILE = os.path.join(STATIC_DIR, '.sweeper.lock')
+
+_lock = threading.Lock()
+_sweeper_thread = None
+
+def _load_env_limits():
+    """Aplica os limites definidos por variáveis de ambiente (ex.: STORAGE_CHARTS_MAX_MB, STORAGE_CHARTS_TTL)"""
+    for name, limits in STORAGE_LIMITS.items():
+        max_mb = os.environ.get(f'STORAGE_{name.upper()}_MAX_MB')
+        ttl = os.environ.get(f'STORAGE_{name.upper()}_TTL')
+        if max_mb:
+            limits['max_bytes'] = int(float(max_mb) * 1024 * 1024)
+        if ttl:
+            limits['ttl'] = int(ttl)
+
+_load_env_limits()
+
+def configure(name, max_bytes=None, ttl=None):
+    """Altera o orçamento em bytes e/ou o tempo de vida de um diretório gerenciado"""
+    limits = STORAGE_LIMITS.setdefault(name, {'max_bytes': None, 'ttl': None})
+    if max_bytes is not None:
+        limits['max_bytes'] = max_bytes
+    if ttl is not None:
+        limits['ttl'] = ttl
+
+def touch(path):
+    """Registra o acesso a um arquivo gerenciado (caminho absoluto ou relativo a static)"""
+    if not os.path.isabs(path):
+        path = os.path.join(STATIC_DIR, path)
+    # Atualiza as datas do próprio arquivo (o atime costuma estar desativado), visíveis a todos os processos
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+def _collect_entries(directory, now=None):
+    """Agrupa os arquivos do diretório por nome base (ex.: gráfico HTML + imagem PNG)"""
+    now = now or time.time()
+    entries = {}
+    with os.scandir(directory) as it:
+        for item in it:
+            if not item.is_file():
+                continue
+            try:
+                stat = item.stat()
+            except OSError:
+                continue
+            stem = item.name.split('.', 1)[0]
+            if item.name.endswith('.tmp'):
+                # Temporários recentes pertencem a uma escrita em andamento; os antigos são sobras
+                # de uma escrita interrompida e formam uma entrada própria, sem levar o arquivo final
+                if now - stat.st_mtime <= TEMP_FILE_GRACE:
+                    continue
+                stem = item.name
+            last_access = max(stat.st_atime, stat.st_mtime)
+            entry = entries.setdefault(stem, {'paths': [], 'size': 0, 'last_access': 0})
+            entry['paths'].append(item.path)
+            entry['size'] += stat.st_size
+            entry['last_access'] = max(entry['last_access'], last_access)
+    return list(entries.values())
+
+def _remove_entry(entry):
+    """Remove todos os arquivos de uma entrada e retorna quantos bytes foram liberados"""
+    for path in entry['paths']:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+    return entry['size']
+
+def sweep_directory(name, now=None):
+    """Remove arquivos expirados e, se necessário, os menos acessados até caber no orçamento"""
+    limits = STORAGE_LIMITS.get(name)
+    directory = os.path.join(STATIC_DIR, name)
+    if limits is None or not os.path.isdir(directory):
+        return 0
+
+    now = now or time.time()
+    entries = _collect_entries(directory, now)
+    removed = 0
+
+    # Remove as entradas que ultrapassaram o tempo de vida
+    ttl = limits.get('ttl')
+    if ttl:
+        alive = []
+        for entry in entries:
+            if now - entry['last_access'] > ttl:
+                _remove_entry(entry)
+                removed += 1
+            else:
+                alive.append(entry)
+        entries = alive
+
+    # Remove as entradas menos recentemente acessadas até respeitar o orçamento
+    max_bytes = limits.get('max_bytes')
+    if max_bytes:
+        total = sum(entry['size'] for entry in entries)
+        entries.sort(key=lambda entry: entry['last_access'])
+        for entry in entries:
+            if total <= max_bytes:
+                break
+            total -= _remove_entry(entry)
+            removed += 1
+
+    return removed
+
+def sweep():
+    """Executa a limpeza em todos os diretórios gerenciados"""
+    removed = {}
+    for name in list(STORAGE_LIMITS):
+        try:
+            removed[name] = sweep_directory(name)
+        except Exception as e:
+            print(f"Erro ao limpar o diretório {name}: {str(e)}")
+    return removed
+
+def _acquire_sweeper_lock():
+    """Tenta assumir a limpeza entre os processos; retorna o arquivo de bloqueio (mantido aberto) ou None se outro processo já a executa"""
+    if fcntl is None:
+        # Sem fcntl não há como coordenar os processos: cada um faz a própria limpeza
+        return True
+    lock = open(SWEEPER_LOCK_FILE, 'a+')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+def _sweep_loop(interval):
+    """Laço da thread de limpeza em segundo plano (só varre no processo que detém o bloqueio)"""
+    lock = None
+    while True:
+        # Os demais processos tentam de novo a cada intervalo e assumem se o responsável terminar
+        if lock is None:
+            try:
+                lock = _acquire_sweeper_lock()
+            except OSError as e:
+                print(f"Erro ao obter o bloqueio da limpeza: {str(e)}")
+        if lock is not None:
+            sweep()
+        time.sleep(interval)
+
+def start_sweeper(interval=None):
+    """Inicia (uma única vez por processo) a thread de limpeza; apenas um processo por vez executa a varredura"""
+    global _sweeper_thread
+    with _lock:
+        if _sweeper_thread is not None and _sweeper_thread.is_alive():
+            return _sweeper_thread
+        _sweeper_thread = threading.Thread(
+            target=_sweep_loop,
+            args=(interval or SWEEP_INTERVAL,),
+            name='storage-sweeper',
+            daemon=True
+        )
+        _sweeper_thread.start()
+    return _sweeper_thread
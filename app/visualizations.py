@@ -6,17 +6,25 @@ Módulo para geração de gráficos e visualizações
 """
 
 import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.io as pio
+from plotly.utils import PlotlyJSONEncoder
+from plotly.offline import get_plotlyjs
 import pandas as pd
 import numpy as np
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import uuid
 from datetime import datetime
 import tempfile
 import jinja2
 import pdfkit
+from . import analytics, storage, render_service
 
 # Diretório para armazenar os gráficos gerados
 CHARTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'charts')
@@ -24,6 +32,33 @@ CHARTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static',
 # Certifica-se que o diretório existe
 os.makedirs(CHARTS_DIR, exist_ok=True)
 
+# Diretório do Plotly.js servido localmente (copiado da biblioteca plotly instalada)
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'vendor')
+_plotly_bundle = None
+_plotly_bundle_lock = threading.Lock()
+
+# Cache LRU das especificações JSON dos gráficos (a chave já inclui a versão dos dados)
+CHART_SPEC_CACHE_SIZE = int(os.environ.get('CHART_SPEC_CACHE_SIZE', 512))
+_spec_cache = OrderedDict()
+_spec_cache_lock = threading.Lock()
+
+# Renderização paralela dos arquivos de gráficos: threads para os gráficos plotly (escrita em disco);
+# as nuvens de palavras vão para os processos do render_service. 0 desativa o pool de threads
+CHART_RENDER_THREADS = int(os.environ.get('CHART_RENDER_THREADS', 4))
+_thread_pool = None
+_pool_lock = threading.Lock()
+
+# Origem de um gráfico: prefixo e dados de entrada da chave de conteúdo, e a função que monta a figura
+# plotly (`figure()`) ou que renderiza a imagem no arquivo indicado (`image(filename)`, executada
+# pelo render_service e por isso uma função de módulo, serializável entre processos)
+ChartSource = namedtuple('ChartSource', ['prefix', 'payload', 'figure', 'image'])
+
+# Tipos de gráfico de um período (chaves de _chart_sources)
+CHART_KINDS = frozenset(
+    ['bar', 'radar', 'pie', 'wordcloud', 'overall_satisfaction', 'category_comparison', 'rating_distribution',
+     'trend_chart'] + [f'distribution_{area}' for area in analytics.AREAS]
+)
+
 # Cores a serem usadas nos gráficos
 COLORS = {
     'lideranca': '#1f77b4',
@@ -37,62 +72,215 @@ COLORS = {
     'neutral': '#7f7f7f'
 }
 
-def _generate_unique_filename(prefix):
-    """Gera um nome de arquivo único para salvar os gráficos"""
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    unique_id = str(uuid.uuid4())[:8]
-    return f"{prefix}_{timestamp}_{unique_id}.html"
+def _normalize_payload(value):
+    """Converte os dados de entrada de um gráfico em uma estrutura serializável e determinística"""
+    if isinstance(value, dict):
+        return sorted((str(k), _normalize_payload(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_normalize_payload(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def plotly_bundle():
+    """Retorna o nome do arquivo local do Plotly.js, com a impressão digital do conteúdo no nome"""
+    global _plotly_bundle
+    if _plotly_bundle is not None:
+        return _plotly_bundle
+    
+    with _plotly_bundle_lock:
+        if _plotly_bundle is None:
+            source = get_plotlyjs()
+            fingerprint = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+            filename = f"plotly-{fingerprint}.min.js"
+            
+            # Como o nome muda junto com o conteúdo, o arquivo é gravado uma única vez
+            file_path = os.path.join(VENDOR_DIR, filename)
+            if not os.path.exists(file_path):
+                os.makedirs(VENDOR_DIR, exist_ok=True)
+                temp_path = f"{file_path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(source)
+                os.replace(temp_path, file_path)
+            _plotly_bundle = filename
+    return _plotly_bundle
+
+def _chart_key(prefix, payload):
+    """Gera a chave de conteúdo de um gráfico (tipo + dados de entrada + versão dos dados e do Plotly.js)"""
+    raw = json.dumps(
+        [prefix, analytics.get_data_version(), plotly_bundle(), _normalize_payload(payload)],
+        default=str
+    )
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+def _chart_filename(prefix, payload):
+    """Retorna o nome do arquivo de um gráfico, derivado do seu conteúdo"""
+    return f"{prefix}_{_chart_key(prefix, payload)}.html"
+
+def _cached_chart(prefix, payload, render):
+    """Retorna o gráfico já gerado para os mesmos dados ou o gera com `render(filename)`"""
+    # O nome do arquivo é derivado do conteúdo, então o próprio diretório funciona como cache
+    filename = _chart_filename(prefix, payload)
+    
+    file_path = os.path.join(CHARTS_DIR, filename)
+    if os.path.exists(file_path):
+        storage.touch(file_path)
+        return os.path.join('charts', filename)
+    
+    return render(filename)
+
+def _cached_spec(source, cached_only=False):
+    """Retorna a especificação JSON (compacta, sem o template) do gráfico; com `cached_only`, None se ainda não existir"""
+    if source.image is not None:
+        # Gráficos renderizados como imagem continuam em arquivo (ex.: nuvem de palavras)
+        if cached_only and not os.path.exists(os.path.join(CHARTS_DIR, _chart_filename(source.prefix, source.payload))):
+            return None
+        return _image_spec(_cached_chart(source.prefix, source.payload, partial(render_service.render, source.image)))
+    
+    key = (source.prefix, _chart_key(source.prefix, source.payload))
+    with _spec_cache_lock:
+        if key in _spec_cache:
+            _spec_cache.move_to_end(key)
+            return _spec_cache[key]
+    if cached_only:
+        return None
+    
+    try:
+        fig = _style_figure(source.figure())
+        # O tamanho vem do contêiner na página e o template é enviado uma única vez por lote
+        fig.update_layout(width=None, height=None, template=None)
+        spec = fig.to_json(validate=False)
+    except Exception as e:
+        print(f"Erro ao gerar especificação do gráfico: {str(e)}")
+        return None
+    
+    with _spec_cache_lock:
+        _spec_cache[key] = spec
+        if len(_spec_cache) > CHART_SPEC_CACHE_SIZE:
+            _spec_cache.popitem(last=False)
+    return spec
+
+def _image_spec(path):
+    """Retorna a especificação de um gráfico renderizado como imagem (ex.: nuvem de palavras)"""
+    if not path:
+        return None
+    return json.dumps({'image': path.replace('.html', '.png')})
+
+def _render_pool():
+    """Retorna o pool de threads dos gráficos plotly, criado sob demanda; None se estiver desativado"""
+    global _thread_pool
+    with _pool_lock:
+        if _thread_pool is None and CHART_RENDER_THREADS > 0:
+            # O plotly importa o serializador sob demanda sem proteção entre threads; a primeira
+            # serialização acontece aqui, antes de qualquer gráfico ser gerado em paralelo
+            go.Figure(go.Bar()).to_json()
+            _thread_pool = ThreadPoolExecutor(max_workers=CHART_RENDER_THREADS, thread_name_prefix='chart-render')
+        return _thread_pool
+
+def _render_chart_file(source):
+    """Gera (ou reaproveita) o arquivo de um gráfico e retorna seu caminho relativo a static"""
+    if source.image is not None:
+        return _cached_chart(source.prefix, source.payload, partial(render_service.render, source.image))
+    return _cached_chart(source.prefix, source.payload,
+                         lambda filename: _save_plotly_chart(source.figure(), filename))
+
+def _render_chart_files(sources):
+    """Gera os arquivos de vários gráficos em paralelo (ou em sequência, sem pools) e retorna {tipo: caminho}"""
+    thread_pool = _render_pool()
+    
+    charts = {}
+    futures = {}
+    for kind, source in sources.items():
+        filename = _chart_filename(source.prefix, source.payload)
+        file_path = os.path.join(CHARTS_DIR, filename)
+        if os.path.exists(file_path):
+            storage.touch(file_path)
+            charts[kind] = os.path.join('charts', filename)
+            continue
+        
+        # As imagens vão para os processos de renderização; sem eles, seguem como os demais gráficos
+        future = render_service.submit(source.image, filename) if source.image is not None else None
+        if future is not None:
+            futures[kind] = future
+        elif thread_pool is not None:
+            futures[kind] = thread_pool.submit(_render_chart_file, source)
+        else:
+            charts[kind] = _render_chart_file(source)
+    
+    for kind, future in futures.items():
+        try:
+            charts[kind] = future.result()
+        except BrokenProcessPool as e:
+            render_service.disable_pool(str(e))
+            charts[kind] = _render_chart_file(sources[kind])
+        except Exception as e:
+            print(f"Erro ao gerar gráfico {kind}: {str(e)}")
+            charts[kind] = None
+    
+    # Mantém a ordem dos tipos de gráfico
+    return {kind: charts[kind] for kind in sources}
+
+def _area_means(analysis_data):
+    """Retorna a lista de pares (área, média) usada por vários gráficos"""
+    return [(area, data['mean']) for area, data in analysis_data['areas'].items()]
+
+def _style_figure(fig):
+    """Aplica o estilo comum (fonte, cores, margens e eixos) aos gráficos plotly"""
+    fig.update_layout(
+        margin=dict(
+            l=80,   # Reduzido de 100 para 80
+            r=30,   # Reduzido de 50 para 30
+            t=50,   # Reduzido de 100 para 50
+            b=80    # Reduzido de 100 para 80
+        ),
+        font=dict(
+            family="Arial, sans-serif",
+            size=12,
+            color="white"
+        ),
+        plot_bgcolor='rgba(48, 48, 48, 0.8)',
+        paper_bgcolor='rgba(0, 0, 0, 0)'
+    )
+    
+    # Força a configuração dos eixos
+    fig.update_xaxes(
+        title=dict(
+            font=dict(size=12, color='white'),
+            standoff=30
+        ),
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='rgba(128, 128, 128, 0.2)',
+        linewidth=1,
+        linecolor='rgba(255, 255, 255, 0.5)',
+        tickfont=dict(size=10, color='white')
+    )
+    
+    fig.update_yaxes(
+        title=dict(
+            font=dict(size=12, color='white'),
+            standoff=30
+        ),
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='rgba(128, 128, 128, 0.2)',
+        linewidth=1,
+        linecolor='rgba(255, 255, 255, 0.5)',
+        tickfont=dict(size=10, color='white')
+    )
+    return fig
 
 def _save_plotly_chart(fig, filename):
     """Salva um gráfico plotly em arquivo HTML"""
     file_path = os.path.join(CHARTS_DIR, filename)
     
     try:
-        # Força o tamanho do gráfico e margens
+        # Força o tamanho do gráfico e o estilo comum
         fig.update_layout(
             width=450,  # Reduzido de 600 para 450
-            height=300,  # Reduzido de 400 para 300
-            margin=dict(
-                l=80,   # Reduzido de 100 para 80
-                r=30,   # Reduzido de 50 para 30
-                t=50,   # Reduzido de 100 para 50
-                b=80    # Reduzido de 100 para 80
-            ),
-            font=dict(
-                family="Arial, sans-serif",
-                size=12,
-                color="white"
-            ),
-            plot_bgcolor='rgba(48, 48, 48, 0.8)',
-            paper_bgcolor='rgba(0, 0, 0, 0)'
-        )
-        
-        # Força a configuração dos eixos
-        fig.update_xaxes(
-            title=dict(
-                font=dict(size=12, color='white'),
-                standoff=30
-            ),
-            showgrid=True,
-            gridwidth=1,
-            gridcolor='rgba(128, 128, 128, 0.2)',
-            linewidth=1,
-            linecolor='rgba(255, 255, 255, 0.5)',
-            tickfont=dict(size=10, color='white')
-        )
-        
-        fig.update_yaxes(
-            title=dict(
-                font=dict(size=12, color='white'),
-                standoff=30
-            ),
-            showgrid=True,
-            gridwidth=1,
-            gridcolor='rgba(128, 128, 128, 0.2)',
-            linewidth=1,
-            linecolor='rgba(255, 255, 255, 0.5)',
-            tickfont=dict(size=10, color='white')
+            height=300  # Reduzido de 400 para 300
         )
+        _style_figure(fig)
         
         # Salva como HTML com configurações otimizadas
         config = {
@@ -101,63 +289,24 @@ def _save_plotly_chart(fig, filename):
             'staticPlot': False  # Alterado para false para permitir interatividade
         }
         
+        # Escreve em arquivo temporário e renomeia para que o gráfico nunca seja lido pela metade
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
         fig.write_html(
-            file_path,
+            temp_path,
             config=config,
-            include_plotlyjs='cdn',
+            include_plotlyjs=f'../vendor/{plotly_bundle()}',
             full_html=True,
-            include_mathjax='cdn'
+            include_mathjax=False
         )
+        os.replace(temp_path, file_path)
         
         return os.path.join('charts', filename)
     except Exception as e:
         print(f"Erro ao salvar gráfico: {str(e)}")
         return None
 
-def _save_matplotlib_chart(fig, filename):
-    """Salva um gráfico matplotlib em arquivo HTML"""
-    file_path = os.path.join(CHARTS_DIR, filename)
-    
-    try:
-        # Configura o estilo do gráfico
-        plt.style.use('dark_background')
-        fig.patch.set_facecolor('#303030')
-        
-        # Salva como PNG com alta resolução
-        png_path = os.path.join(CHARTS_DIR, filename.replace('.html', '.png'))
-        fig.savefig(png_path, 
-                    dpi=150, 
-                    bbox_inches='tight', 
-                    facecolor='#303030',
-                    edgecolor='none',
-                    pad_inches=0.1)
-        
-        # Cria um HTML simples que exibe a imagem PNG
-        html_content = f'''
-        <html>
-        <head>
-            <style>
-                body {{ margin: 0; padding: 0; background: transparent; }}
-                img {{ width: 100%; height: 100%; object-fit: contain; }}
-            </style>
-        </head>
-        <body>
-            <img src="{filename.replace('.html', '.png')}" alt="Wordcloud">
-        </body>
-        </html>
-        '''
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        plt.close(fig)
-        return os.path.join('charts', filename)
-    except Exception as e:
-        print(f"Erro ao salvar gráfico matplotlib: {str(e)}")
-        return None
-
-def generate_bar_chart(analysis_data):
-    """Gera um gráfico de barras das médias por área"""
+def _bar_chart_figure(analysis_data):
+    """Monta a figura do gráfico de barras das médias por área"""
     areas = []
     means = []
     
@@ -218,12 +367,10 @@ def generate_bar_chart(analysis_data):
         margin=dict(l=80, r=30, t=50, b=80)  # Aumenta as margens para acomodar os títulos
     )
     
-    # Salva o gráfico
-    filename = _generate_unique_filename('bar_chart')
-    return _save_plotly_chart(fig, filename)
+    return fig
 
-def generate_radar_chart(analysis_data):
-    """Gera um gráfico radar (também conhecido como gráfico de aranha)"""
+def _radar_chart_figure(analysis_data):
+    """Monta a figura do gráfico radar das médias por área"""
     areas = []
     means = []
     
@@ -275,18 +422,10 @@ def generate_radar_chart(analysis_data):
         title_text='Visão Geral da Satisfação'
     )
     
-    # Salva o gráfico
-    filename = _generate_unique_filename('radar_chart')
-    return _save_plotly_chart(fig, filename)
+    return fig
 
-def generate_pie_chart(analysis_data):
-    """Gera um gráfico de pizza dos sentimentos dos comentários"""
-    # Conta os sentimentos
-    sentiments = {'positive': 0, 'negative': 0, 'neutral': 0}
-    
-    for comment in analysis_data['comments']:
-        sentiments[comment['sentiment']] += 1
-    
+def _pie_chart_figure(sentiments):
+    """Monta a figura do gráfico de pizza dos sentimentos dos comentários"""
     # Converte para listas para criar o gráfico
     labels = ['Positivo', 'Negativo', 'Neutro']
     values = [sentiments['positive'], sentiments['negative'], sentiments['neutral']]
@@ -328,56 +467,10 @@ def generate_pie_chart(analysis_data):
         )]
     )
     
-    # Salva o gráfico
-    filename = _generate_unique_filename('pie_chart')
-    return _save_plotly_chart(fig, filename)
+    return fig
 
-def generate_wordcloud(analysis_data):
-    """Gera uma nuvem de palavras a partir das palavras-chave dos comentários"""
-    plt.close('all')  # Fecha todas as figuras anteriores
-    
-    # Obtém as palavras-chave
-    keywords = analysis_data.get('keywords', {})
-    
-    if not keywords:
-        return None
-    
-    # Cria a figura matplotlib
-    plt.figure(figsize=(9, 4.5))
-    
-    # Cria a nuvem de palavras com configurações melhoradas
-    wc = WordCloud(
-        width=900,
-        height=450,
-        background_color='#303030',
-        colormap='viridis',
-        max_words=50,
-        min_font_size=10,
-        max_font_size=60,
-        prefer_horizontal=0.7,
-        relative_scaling=0.5,
-        color_func=lambda *args, **kwargs: (255, 255, 255)
-    ).generate_from_frequencies(keywords)
-    
-    # Cria a figura
-    fig, ax = plt.subplots(figsize=(9, 4.5))
-    ax.imshow(wc, interpolation='bilinear')
-    ax.axis('off')
-    
-    # Ajusta o layout
-    plt.tight_layout(pad=0)
-    
-    # Salva o gráfico
-    filename = _generate_unique_filename('wordcloud')
-    result = _save_matplotlib_chart(fig, filename)
-    plt.close('all')  # Fecha todas as figuras
-    return result
-
-def generate_distribution_chart(analysis_data, area):
-    """Gera um gráfico de distribuição de respostas para uma área específica"""
-    if area not in analysis_data['areas']:
-        return None
-    
+def _distribution_chart_figure(analysis_data, area):
+    """Monta a figura de distribuição de respostas para uma área específica"""
     # Obtém a distribuição
     distribution = analysis_data['areas'][area]['distribution']
     
@@ -417,51 +510,98 @@ def generate_distribution_chart(analysis_data, area):
     fig.update_xaxes(title_text='Nota de Avaliação (1-5)')
     fig.update_yaxes(title_text='Quantidade de Respostas')
     
-    # Salva o gráfico
-    filename = _generate_unique_filename(f'distribution_{area}')
-    return _save_plotly_chart(fig, filename)
+    return fig
 
 def generate_charts(analysis_data, period_type, period_value):
     """Gera todos os gráficos para um período específico"""
     if analysis_data is None:
         return {}
     
-    charts = {}
-    
-    # Gráfico de barras
-    charts['bar'] = generate_bar_chart(analysis_data)
-    
-    # Gráfico radar
-    charts['radar'] = generate_radar_chart(analysis_data)
-    
-    # Gráfico de pizza dos sentimentos
-    if analysis_data['comments']:
-        charts['pie'] = generate_pie_chart(analysis_data)
+    # Os gráficos são independentes entre si e gerados em paralelo
+    return _render_chart_files(_chart_sources(analysis_data))
+
+def _chart_sources(analysis_data):
+    """Retorna {tipo: ChartSource} com os gráficos de um período (mesmas chaves de generate_charts)"""
+    sources = OrderedDict()
+    
+    sources['bar'] = ChartSource('bar_chart', _area_means(analysis_data),
+                                 lambda: _bar_chart_figure(analysis_data), None)
+    sources['radar'] = ChartSource('radar_chart', _area_means(analysis_data),
+                                   lambda: _radar_chart_figure(analysis_data), None)
+    
+    if analysis_data.get('comment_count', len(analysis_data['comments'])):
+        sentiments = analytics.get_sentiment_counts(analysis_data)
+        sources['pie'] = ChartSource('pie_chart', sentiments, lambda: _pie_chart_figure(sentiments), None)
     else:
-        # Gera um gráfico de exemplo se não houver comentários
-        charts['pie'] = generate_example_pie_chart()
+        sources['pie'] = ChartSource('pie_chart_example', None, _example_pie_chart_figure, None)
     
-    # Nuvem de palavras
-    if analysis_data['keywords']:
-        charts['wordcloud'] = generate_wordcloud(analysis_data)
+    # A nuvem de palavras continua sendo uma imagem gerada no servidor
+    keywords = analysis_data['keywords']
+    if keywords:
+        sources['wordcloud'] = ChartSource('wordcloud', keywords, None, partial(render_service.render_wordcloud, dict(keywords)))
     else:
-        # Gera uma nuvem de palavras de exemplo se não houver palavras-chave
-        charts['wordcloud'] = generate_example_wordcloud()
+        sources['wordcloud'] = ChartSource('wordcloud_example', None, None,
+                                           render_service.render_example_wordcloud)
     
-    # Gráficos de distribuição para cada área
     for area in analysis_data['areas']:
-        charts[f'distribution_{area}'] = generate_distribution_chart(analysis_data, area)
+        sources[f'distribution_{area}'] = ChartSource(
+            f'distribution_{area}', analysis_data['areas'][area]['distribution'],
+            lambda area=area: _distribution_chart_figure(analysis_data, area), None
+        )
+    
+    if analysis_data['areas']:
+        sources['overall_satisfaction'] = ChartSource(
+            'overall_satisfaction', analysis_data.get('overall_mean'),
+            lambda: _overall_satisfaction_figure(analysis_data), None
+        )
+        sources['category_comparison'] = ChartSource(
+            'category_comparison', _area_means(analysis_data),
+            lambda: _category_comparison_figure(analysis_data), None
+        )
+        sources['rating_distribution'] = ChartSource(
+            'rating_distribution',
+            [(area, data.get('distribution', {})) for area, data in analysis_data['areas'].items()],
+            lambda: _rating_distribution_figure(analysis_data), None
+        )
     
-    # Adiciona gráficos extras para exibição na seção de visão geral
-    charts['overall_satisfaction'] = generate_overall_satisfaction_chart(analysis_data)
-    charts['category_comparison'] = generate_category_comparison_chart(analysis_data)
-    charts['rating_distribution'] = generate_rating_distribution_chart(analysis_data)
-    charts['trend_chart'] = generate_trend_chart(analysis_data)
+    period = analysis_data.get('period')
+    if period:
+        trend = analytics.get_trend('auto', period['type'], period['value'])
+    else:
+        trend = analytics.get_trend('auto')
+    sources['trend_chart'] = ChartSource('trend_chart', trend, lambda: _trend_chart_figure(trend), None)
     
-    return charts
+    return sources
+
+def generate_chart_specs(analysis_data, cached_only=False):
+    """Gera as especificações JSON dos gráficos de um período; com `cached_only`, os ainda não gerados ficam None"""
+    if analysis_data is None:
+        return {}
+    return {kind: _cached_spec(source, cached_only) for kind, source in _chart_sources(analysis_data).items()}
+
+def generate_chart_spec(analysis_data, kind):
+    """Gera (ou obtém do cache) a especificação JSON de um único gráfico do período; None se o tipo não existir"""
+    if analysis_data is None:
+        return None
+    source = _chart_sources(analysis_data).get(kind)
+    return _cached_spec(source) if source else None
+
+_template_json = None
+
+def chart_specs_json(specs):
+    """Monta o lote JSON das especificações ({"template": ..., "charts": {chave: figura}}) para a página"""
+    global _template_json
+    if _template_json is None:
+        _template_json = json.dumps(pio.templates[pio.templates.default].to_plotly_json(),
+                                    cls=PlotlyJSONEncoder, separators=(',', ':'))
+    
+    charts = ','.join(f'{json.dumps(key)}:{spec}' for key, spec in specs.items() if spec)
+    payload = f'{{"template":{_template_json},"charts":{{{charts}}}}}'
+    # Escapa os caracteres que poderiam encerrar o <script> onde o lote é embutido
+    return payload.replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
 
-def generate_example_pie_chart():
-    """Gera um gráfico de pizza de exemplo quando não há dados reais"""
+def _example_pie_chart_figure():
+    """Monta a figura do gráfico de pizza de exemplo"""
     # Dados de exemplo
     labels = ['Positivo', 'Negativo', 'Neutro']
     values = [60, 25, 15]
@@ -480,55 +620,10 @@ def generate_example_pie_chart():
         title='Sentimento dos Comentários (Exemplo)',
     )
     
-    # Salva o gráfico
-    filename = _generate_unique_filename('pie_chart_example')
-    return _save_plotly_chart(fig, filename)
-
-def generate_example_wordcloud():
-    """Gera uma nuvem de palavras de exemplo quando não há dados reais"""
-    plt.close('all')  # Fecha todas as figuras anteriores
-    
-    # Palavras de exemplo relacionadas a feedback de funcionários
-    text = "satisfação trabalho equipe liderança comunicação benefícios salário horário flexibilidade " \
-           "ambiente cultura empresa desenvolvimento carreira oportunidade crescimento reconhecimento " \
-           "feedback gestor relacionamento colegas projetos desafios motivação engajamento " \
-           "propósito valores missão visão estratégia inovação tecnologia ferramentas processos " \
-           "burocracia autonomia responsabilidade confiança transparência respeito diversidade " \
-           "inclusão bem-estar qualidade vida equilíbrio"
-    
-    # Cria um dicionário de frequências simuladas
-    words = text.split()
-    import random
-    frequencies = {word: random.randint(5, 30) for word in words}
-    
-    # Cria a nuvem de palavras
-    wc = WordCloud(
-        width=800, 
-        height=400, 
-        background_color='white',
-        colormap='viridis',
-        max_words=100,
-        contour_width=1,
-        contour_color='steelblue'
-    ).generate_from_frequencies(frequencies)
-    
-    # Cria a figura
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.imshow(wc, interpolation='bilinear')
-    ax.axis('off')
-    ax.set_title('Palavras-chave dos Comentários (Exemplo)', fontsize=16)
-    
-    # Salva o gráfico
-    filename = _generate_unique_filename('wordcloud_example')
-    result = _save_matplotlib_chart(fig, filename)
-    plt.close('all')  # Fecha todas as figuras
-    return result
-
-def generate_overall_satisfaction_chart(analysis_data):
-    """Gera um gráfico de satisfação geral para a seção de visão geral"""
-    if analysis_data is None or not analysis_data['areas']:
-        return None
-    
+    return fig
+
+def _overall_satisfaction_figure(analysis_data):
+    """Monta a figura de satisfação geral (gauge)"""
     # Calcula a média geral
     overall_mean = analysis_data.get('overall_mean', sum(data['mean'] for _, data in analysis_data['areas'].items()) / len(analysis_data['areas']))
     
@@ -557,15 +652,10 @@ def generate_overall_satisfaction_chart(analysis_data):
         margin=dict(l=20, r=20, t=50, b=20),
     )
     
-    # Salva o gráfico
-    filename = _generate_unique_filename('overall_satisfaction')
-    return _save_plotly_chart(fig, filename)
+    return fig
 
-def generate_category_comparison_chart(analysis_data):
-    """Gera um gráfico comparativo de categorias para a seção de visão geral"""
-    if analysis_data is None or not analysis_data['areas']:
-        return None
-    
+def _category_comparison_figure(analysis_data):
+    """Monta a figura comparativa de categorias"""
     # Preparar dados
     categories = []
     values = []
@@ -608,15 +698,10 @@ def generate_category_comparison_chart(analysis_data):
         margin=dict(l=80, r=30, t=50, b=80)  # Aumenta as margens para acomodar os títulos
     )
     
-    # Salva o gráfico
-    filename = _generate_unique_filename('category_comparison')
-    return _save_plotly_chart(fig, filename)
+    return fig
 
-def generate_rating_distribution_chart(analysis_data):
-    """Gera um gráfico de distribuição de avaliações para a seção de visão geral"""
-    if analysis_data is None or not analysis_data['areas']:
-        return None
-    
+def _rating_distribution_figure(analysis_data):
+    """Monta a figura da distribuição combinada de avaliações"""
     # Combinar as distribuições de todas as áreas
     combined_dist = {}
     for area, data in analysis_data['areas'].items():
@@ -652,51 +737,48 @@ def generate_rating_distribution_chart(analysis_data):
         margin=dict(l=20, r=20, t=50, b=20),
     )
     
-    # Salva o gráfico
-    filename = _generate_unique_filename('rating_distribution')
-    return _save_plotly_chart(fig, filename)
-
-def generate_trend_chart(analysis_data):
-    """Gera um gráfico de tendência temporal para a seção de visão geral"""
-    # Cria dados simulados de tendência, já que não temos dados históricos
-    months = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun']
-    
-    # Gera dados simulados com uma tendência ligeiramente positiva
-    import random
-    base_value = 3.5
-    # Se temos dados reais, usa a média como base
-    if analysis_data and analysis_data.get('areas'):
-        area_means = [data['mean'] for _, data in analysis_data['areas'].items()]
-        if area_means:
-            base_value = sum(area_means) / len(area_means)
-    
-    # Gera valores com pequena variação e tendência de melhoria
-    values = []
-    for i in range(len(months)):
-        # Tendência positiva sutil
-        trend = i * 0.05
-        # Variação aleatória para tornar mais realista
-        variation = random.uniform(-0.2, 0.2)
-        # Valor final (limitado entre 1 e 5)
-        value = min(5, max(1, base_value + trend + variation))
-        values.append(value)
-    
-    # Cria o gráfico
+    return fig
+
+def _trend_chart_figure(trend):
+    """Monta a figura de tendência temporal a partir das médias por balde de tempo"""
     fig = go.Figure()
     
-    fig.add_trace(go.Scatter(
-        x=months,
-        y=values,
-        mode='lines+markers',
-        line=dict(color='#1f77b4', width=3),
-        marker=dict(size=8)
-    ))
+    titles = {
+        'month': ('Tendência de Satisfação (Mensal)', 'Período (Meses)'),
+        'week': ('Tendência de Satisfação (Semanal)', 'Período (Semanas)'),
+        'rolling': ('Tendência de Satisfação (Média Móvel)', 'Período (Dias)')
+    }
+    title, axis_title = titles.get(trend['granularity'] if trend else None, ('Tendência de Satisfação', 'Período'))
+    
+    if trend:
+        # Média geral em destaque e cada área disponível na legenda
+        fig.add_trace(go.Scatter(
+            x=trend['labels'],
+            y=trend['overall'],
+            name='Geral',
+            mode='lines+markers',
+            line=dict(color='#1f77b4', width=3),
+            marker=dict(size=8),
+            customdata=trend['counts'],
+            hovertemplate='%{x}<br>Média: %{y:.2f}<br>Entrevistas: %{customdata}<extra></extra>'
+        ))
+        for area, values in trend['areas'].items():
+            fig.add_trace(go.Scatter(
+                x=trend['labels'],
+                y=values,
+                name=area.capitalize(),
+                mode='lines',
+                visible='legendonly'
+            ))
+    else:
+        fig.add_annotation(text='Sem dados suficientes para a tendência', showarrow=False,
+                           xref='paper', yref='paper', x=0.5, y=0.5)
     
     fig.update_layout(
-        title='Tendência de Satisfação (Últimos 6 meses)',
+        title=title,
         xaxis=dict(
             title=dict(
-                text='Período (Meses)',
+                text=axis_title,
                 font=dict(size=12, color='white'),
                 standoff=15
             )
@@ -713,33 +795,63 @@ def generate_trend_chart(analysis_data):
         margin=dict(l=80, r=30, t=50, b=80)  # Aumenta as margens para acomodar os títulos
     )
     
-    # Salva o gráfico
-    filename = _generate_unique_filename('trend_chart')
-    return _save_plotly_chart(fig, filename)
+    return fig
+
+def _comparison_payload(comparison_data, include_areas=True):
+    """Retorna os dados de entrada comuns aos gráficos comparativos"""
+    payload = [
+        (comparison_data['period1']['type'], comparison_data['period1']['value']),
+        (comparison_data['period2']['type'], comparison_data['period2']['value'])
+    ]
+    if include_areas:
+        payload.append([
+            (area, data['period1']['mean'], data['period2']['mean'])
+            for area, data in comparison_data['areas'].items()
+        ])
+    return payload
+
+def _comparison_chart_sources(comparison_data):
+    """Retorna {tipo: ChartSource} com os gráficos comparativos (mesmas chaves de generate_comparison_charts)"""
+    sources = OrderedDict()
+    
+    sources['bar_comparison'] = ChartSource(
+        'bar_comparison', _comparison_payload(comparison_data),
+        lambda: _comparison_bar_figure(comparison_data), None
+    )
+    sources['radar_comparison'] = ChartSource(
+        'radar_comparison', _comparison_payload(comparison_data),
+        lambda: _comparison_radar_figure(comparison_data), None
+    )
+    
+    for area, area_data in comparison_data['areas'].items():
+        payload = [
+            _comparison_payload(comparison_data, include_areas=False),
+            area_data['period1']['distribution'],
+            area_data['period2']['distribution']
+        ]
+        sources[f'distribution_comparison_{area}'] = ChartSource(
+            f'distribution_comparison_{area}', payload,
+            lambda area=area: _comparison_distribution_figure(comparison_data, area), None
+        )
+    
+    return sources
 
 def generate_comparison_charts(comparison_data):
     """Gera gráficos comparativos entre dois períodos"""
     if comparison_data is None:
         return {}
     
-    charts = {}
-    
-    # Gráfico de barras comparativo
-    charts['bar_comparison'] = _generate_comparison_bar_chart(comparison_data)
-    
-    # Gráfico radar comparativo
-    charts['radar_comparison'] = _generate_comparison_radar_chart(comparison_data)
-    
-    # Gráficos de distribuição comparativos para cada área
-    for area in comparison_data['areas']:
-        charts[f'distribution_comparison_{area}'] = _generate_comparison_distribution_chart(
-            comparison_data, area
-        )
-    
-    return charts
+    # Os gráficos são independentes entre si e gerados em paralelo
+    return _render_chart_files(_comparison_chart_sources(comparison_data))
+
+def generate_comparison_chart_specs(comparison_data):
+    """Gera as especificações JSON dos gráficos comparativos (mesmas chaves de generate_comparison_charts)"""
+    if comparison_data is None:
+        return {}
+    return {kind: _cached_spec(source) for kind, source in _comparison_chart_sources(comparison_data).items()}
 
-def _generate_comparison_bar_chart(comparison_data):
-    """Gera um gráfico de barras comparativo entre dois períodos"""
+def _comparison_bar_figure(comparison_data):
+    """Monta a figura de barras comparativa entre dois períodos"""
     # Prepara os dados para o gráfico
     areas = []
     means_period1 = []
@@ -778,12 +890,10 @@ def _generate_comparison_bar_chart(comparison_data):
         bargroupgap=0.1
     )
     
-    # Salva o gráfico
-    filename = _generate_unique_filename('bar_comparison')
-    return _save_plotly_chart(fig, filename)
+    return fig
 
-def _generate_comparison_radar_chart(comparison_data):
-    """Gera um gráfico radar comparativo entre dois períodos"""
+def _comparison_radar_figure(comparison_data):
+    """Monta a figura radar comparativa entre dois períodos"""
     # Prepara os dados para o gráfico
     areas = []
     means_period1 = []
@@ -832,15 +942,10 @@ def _generate_comparison_radar_chart(comparison_data):
         showlegend=True
     )
     
-    # Salva o gráfico
-    filename = _generate_unique_filename('radar_comparison')
-    return _save_plotly_chart(fig, filename)
+    return fig
 
-def _generate_comparison_distribution_chart(comparison_data, area):
-    """Gera um gráfico de distribuição comparativo para uma área específica"""
-    if area not in comparison_data['areas']:
-        return None
-    
+def _comparison_distribution_figure(comparison_data, area):
+    """Monta a figura de distribuição comparativa para uma área específica"""
     # Obtém os dados de distribuição
     area_data = comparison_data['areas'][area]
     distribution1 = area_data['period1']['distribution']
@@ -884,9 +989,7 @@ def _generate_comparison_distribution_chart(comparison_data, area):
         bargroupgap=0.1
     )
     
-    # Salva o gráfico
-    filename = _generate_unique_filename(f'distribution_comparison_{area}')
-    return _save_plotly_chart(fig, filename)
+    return fig
 
 def generate_report(analysis_data, charts, period_name, period_value):
     """Gera um relatório em PDF com os dados da análise e gráficos."""
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark das estatísticas por área: laço com reduções do pandas vs. kernel de histograma
+
+Uso: python benchmarks/area_statistics.py [número de linhas]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import analytics
+
+def pandas_area_statistics(df):
+    """Implementação anterior: reduções separadas do pandas para cada área"""
+    result = {}
+    for area in analytics.AREAS:
+        result[area] = {
+            'mean': df[area].mean(),
+            'median': df[area].median(),
+            'mode': df[area].mode()[0],
+            'std': df[area].std(),
+            'min': df[area].min(),
+            'max': df[area].max(),
+            'distribution': df[area].value_counts().to_dict()
+        }
+    return result
+
+def best_of(func, df, repeat=3):
+    """Retorna o menor tempo de execução (em segundos) entre as repetições"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({area: rng.integers(1, 6, rows) for area in analytics.AREAS})
+
+    # Confere se os dois caminhos produzem os mesmos resultados
+    expected = pandas_area_statistics(df)
+    got = analytics.compute_area_statistics(df)
+    for area in analytics.AREAS:
+        for key in ('mean', 'median', 'mode', 'std', 'min', 'max'):
+            assert abs(expected[area][key] - got[area][key]) < 1e-9, (area, key)
+        assert expected[area]['distribution'] == got[area]['distribution'], area
+
+    before = best_of(pandas_area_statistics, df)
+    after = best_of(analytics.compute_area_statistics, df)
+    print(f"Linhas: {rows:,}")
+    print(f"Reduções do pandas por área: {before * 1000:.1f} ms")
+    print(f"Kernel de histograma:        {after * 1000:.1f} ms")
+    print(f"Ganho: {before / after:.1f}x")
+
+if __name__ == '__main__':
+    main()
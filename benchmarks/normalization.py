@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark da normalização dos comentários: laço Python por comentário vs. etapa em lote
+
+Uso: python benchmarks/normalization.py [número de comentários]
+"""
+
+import os
+import re
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import analytics
+
+# Palavras usadas para compor os comentários sintéticos (com acentos, pontuação e números)
+WORDS = [
+    'ambiente', 'equipe', 'gestão', 'salário', 'comunicação', 'liderança', 'benefícios', 'horário',
+    'promoção', 'bem-vindo', 'feedback,', 'reuniões.', '2023', 'R$', 'péssima', 'ótimo!', 'não', 'é'
+]
+
+def preprocess_comment(comment):
+    """Implementação anterior: minúsculas e duas substituições por comentário"""
+    comment = comment.lower()
+    comment = re.sub(r'[^\w\s]', '', comment)
+    comment = re.sub(r'\d+', '', comment)
+    return comment
+
+def best_of(func, data, repeat=3):
+    """Retorna o menor tempo de execução (em segundos) entre as repetições"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = np.random.default_rng(42)
+    comments = [' '.join(rng.choice(WORDS, rng.integers(5, 25))).capitalize() for _ in range(count)]
+    series = pd.Series(comments, dtype=pd.StringDtype('pyarrow') if analytics.PYARROW_AVAILABLE else object)
+
+    before = best_of(lambda data: [preprocess_comment(comment) for comment in data], comments)
+    single = best_of(lambda data: [analytics.normalize_text(comment) for comment in data], comments)
+    batch = best_of(analytics.normalize_comments, series)
+
+    # A etapa em lote deve produzir exatamente o mesmo texto que normalize_text
+    agreement = np.mean(analytics.normalize_comments(series).to_numpy() == np.array(
+        [analytics.normalize_text(comment) for comment in comments], dtype=object))
+
+    print(f"Comentários: {count:,}")
+    print(f"Laço por comentário (anterior): {count / before:,.0f} comentários/s")
+    print(f"normalize_text por comentário:  {count / single:,.0f} comentários/s ({before / single:.1f}x)")
+    print(f"normalize_comments (lote):      {count / batch:,.0f} comentários/s ({before / batch:.1f}x)")
+    print(f"Textos iguais entre o lote e normalize_text: {agreement:.1%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark da análise de sentimento: busca de cada termo por substring vs. léxico compilado
+
+Uso: python benchmarks/sentiment.py [número de comentários]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import analytics
+
+# Palavras neutras usadas para compor os comentários sintéticos
+FILLER_WORDS = [
+    'ambiente', 'equipe', 'gestor', 'salário', 'empresa', 'trabalho', 'projeto', 'horário',
+    'bombeiro', 'problemático', 'melhoria', 'proposta', 'carreira', 'benefício', 'time', 'cliente'
+]
+
+def substring_sentiment(text):
+    """Implementação anterior: uma busca por substring para cada termo do léxico"""
+    text_lower = text.lower()
+    positive_count = sum(1 for word in analytics.POSITIVE_WORDS if word in text_lower)
+    negative_count = sum(1 for word in analytics.NEGATIVE_WORDS if word in text_lower)
+    if positive_count > negative_count:
+        return 'positive'
+    elif negative_count > positive_count:
+        return 'negative'
+    else:
+        return 'neutral'
+
+def best_of(func, data, repeat=3):
+    """Retorna o menor tempo de execução (em segundos) entre as repetições"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = np.random.default_rng(42)
+    vocabulary = FILLER_WORDS * 4 + analytics.POSITIVE_WORDS + analytics.NEGATIVE_WORDS
+    comments = [
+        ' '.join(rng.choice(vocabulary, rng.integers(5, 25))).capitalize() + '.'
+        for _ in range(count)
+    ]
+    series = pd.Series(comments, dtype=pd.StringDtype('pyarrow') if analytics.PYARROW_AVAILABLE else object)
+
+    before = best_of(lambda data: [substring_sentiment(text) for text in data], comments)
+    single = best_of(lambda data: [analytics.score_sentiment(text) for text in data], comments)
+    batch = best_of(analytics.score_sentiments, series)
+
+    # Diferenças esperadas: a busca por substring conta 'bom' dentro de 'bombeiro', por exemplo
+    single_labels = [analytics.score_sentiment(text) for text in comments]
+    agreement = np.mean([substring_sentiment(text) == label for text, label in zip(comments, single_labels)])
+
+    # Sem palavras que contêm outro termo do léxico ('bombeiro', 'infeliz', 'não recomendo'), as duas devem coincidir
+    lexicon = analytics.POSITIVE_WORDS + analytics.NEGATIVE_WORDS
+    plain = [word for word in vocabulary if not any(term != word and term in word for term in lexicon)]
+    plain_comments = [' '.join(rng.choice(plain, rng.integers(5, 25))).capitalize() + '.' for _ in range(count // 10)]
+    plain_agreement = np.mean([substring_sentiment(text) == analytics.score_sentiment(text) for text in plain_comments])
+    batch_agreement = np.mean(analytics.score_sentiments(series).astype(str).to_numpy() == np.array(single_labels))
+
+    print(f"Comentários: {count:,}")
+    print(f"Substring por termo:        {count / before:,.0f} comentários/s")
+    print(f"Léxico compilado por texto: {count / single:,.0f} comentários/s ({before / single:.1f}x)")
+    print(f"Série inteira (score_sentiments): {count / batch:,.0f} comentários/s ({before / batch:.1f}x)")
+    print(f"Classificações iguais à implementação anterior: {agreement:.1%}")
+    print(f"Iguais à anterior, sem palavras que contêm termos do léxico: {plain_agreement:.1%}")
+    print(f"Classificações iguais entre a série inteira e o léxico por texto: {batch_agreement:.1%}")
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,9 @@ Sistema Local de Análise de Entrevistas de Desligamento
 Arquivo principal para iniciar o aplicativo Flask
 """
 
-from app.main import app
+# Os processos de renderização reexecutam este arquivo como '__mp_main__' e não precisam do aplicativo
+if __name__ != '__mp_main__':
+    from app.main import app
 
 if __name__ == '__main__':
     print("Iniciando Sistema de Análise de Entrevistas de Desligamento...")